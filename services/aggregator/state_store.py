@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from codec import dumps_json, loads_json
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    reply_to TEXT,
+    expected TEXT NOT NULL,
+    notify_progress INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    deadline_at REAL,
+    service_deadlines TEXT,
+    send_supplements INTEGER NOT NULL DEFAULT 0,
+    published_at REAL,
+    due_at REAL
+);
+CREATE INDEX IF NOT EXISTS tasks_updated_at ON tasks (updated_at);
+CREATE INDEX IF NOT EXISTS tasks_due_at ON tasks (due_at);
+CREATE TABLE IF NOT EXISTS results (
+    task_id TEXT NOT NULL,
+    service TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (task_id, service)
+);
+"""
+
+
+@dataclass
+class AggregationState:
+    expected: Set[str]
+    reply_to: Optional[str]
+    results: Dict[str, Any] = field(default_factory=dict)
+    notify_progress: bool = False
+    updated_at: float = field(default_factory=time.time)
+    deadline_at: Optional[float] = None
+    service_deadlines: Dict[str, float] = field(default_factory=dict)
+    send_supplements: bool = False
+    published_at: Optional[float] = None
+
+    @property
+    def published(self) -> bool:
+        return self.published_at is not None
+
+    def due_at(self) -> Optional[float]:
+        """When a degraded result must be published if the pending services stay silent.
+
+        That is the task deadline, or earlier once every pending service has
+        passed its soft deadline. A complete task that is still unpublished
+        (its final publish failed) is due at once, so the deadline loop
+        retries it. ``None`` means no deadline applies.
+        """
+        if self.published:
+            return None
+        if not self.expected:
+            return self.updated_at
+        candidates = [self.deadline_at] if self.deadline_at is not None else []
+        if all(service in self.service_deadlines for service in self.expected):
+            candidates.append(max(self.service_deadlines[service] for service in self.expected))
+        return min(candidates) if candidates else None
+
+
+class StateStore:
+    """SQLite-backed aggregation state with a bounded in-memory working set.
+
+    Task metadata and every service result are written to a WAL-mode database
+    before the AMQP message is acknowledged, so a restart resumes in-flight tasks
+    instead of dropping them. Results are stored one row per service, so each
+    incoming message is a single insert rather than a rewrite of the whole task.
+    At most ``max_cached`` states are kept in memory (least recently used are
+    reloaded from disk on demand) and tasks untouched for ``ttl`` seconds are
+    evicted by :meth:`sweep`.
+
+    Statements run synchronously on the event loop: with ``synchronous=NORMAL``
+    a WAL commit does not fsync, and keeping every mutation and its write in one
+    uninterrupted step means concurrent consumers never see a half-applied task.
+    """
+
+    def __init__(self, path: Path, *, ttl: float, max_cached: int) -> None:
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_cached = max(1, max_cached)
+        self._db: sqlite3.Connection | None = None
+        self._cache: OrderedDict[str, AggregationState] = OrderedDict()
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            raise RuntimeError("State store is not open")
+        return self._db
+
+    def open(self) -> None:
+        if self._db is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._cache.clear()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def replay(self) -> int:
+        """Drop expired tasks and warm the cache with the most recent ones; return how many remain."""
+        self.sweep()
+        (total,) = self.db.execute("SELECT COUNT(*) FROM tasks").fetchone()
+        rows = self.db.execute(
+            "SELECT task_id FROM tasks ORDER BY updated_at DESC LIMIT ?", (self.max_cached,)
+        ).fetchall()
+        for (task_id,) in reversed(rows):
+            state = self._load(task_id)
+            if state is not None:
+                self._remember(task_id, state)
+        return total
+
+    def get(self, task_id: str) -> AggregationState | None:
+        state = self._cache.get(task_id)
+        if state is not None:
+            self._cache.move_to_end(task_id)
+            return state
+        state = self._load(task_id)
+        if state is not None:
+            self._remember(task_id, state)
+        return state
+
+    def _load(self, task_id: str) -> AggregationState | None:
+        row = self.db.execute(
+            "SELECT reply_to, expected, notify_progress, updated_at, deadline_at, service_deadlines, "
+            "send_supplements, published_at FROM tasks WHERE task_id = ?",
+            (task_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        (
+            reply_to,
+            expected,
+            notify_progress,
+            updated_at,
+            deadline_at,
+            service_deadlines,
+            send_supplements,
+            published_at,
+        ) = row
+        results = {
+            service: loads_json(payload)
+            for service, payload in self.db.execute(
+                "SELECT service, payload FROM results WHERE task_id = ?", (task_id,)
+            )
+        }
+        return AggregationState(
+            expected=set(json.loads(expected)),
+            reply_to=reply_to,
+            results=results,
+            notify_progress=bool(notify_progress),
+            updated_at=updated_at,
+            deadline_at=deadline_at,
+            service_deadlines=json.loads(service_deadlines or "{}"),
+            send_supplements=bool(send_supplements),
+            published_at=published_at,
+        )
+
+    def _remember(self, task_id: str, state: AggregationState) -> None:
+        self._cache[task_id] = state
+        self._cache.move_to_end(task_id)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+
+    def _upsert_task(self, task_id: str, state: AggregationState) -> None:
+        state.updated_at = time.time()
+        self.db.execute(
+            "INSERT INTO tasks (task_id, reply_to, expected, notify_progress, updated_at, deadline_at, "
+            "service_deadlines, send_supplements, published_at, due_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (task_id) DO UPDATE SET reply_to = excluded.reply_to, expected = excluded.expected, "
+            "notify_progress = excluded.notify_progress, updated_at = excluded.updated_at, "
+            "deadline_at = excluded.deadline_at, service_deadlines = excluded.service_deadlines, "
+            "send_supplements = excluded.send_supplements, published_at = excluded.published_at, "
+            "due_at = excluded.due_at",
+            (
+                task_id,
+                state.reply_to,
+                json.dumps(sorted(state.expected)),
+                int(state.notify_progress),
+                state.updated_at,
+                state.deadline_at,
+                json.dumps(state.service_deadlines),
+                int(state.send_supplements),
+                state.published_at,
+                state.due_at(),
+            ),
+        )
+
+    def save(self, task_id: str, state: AggregationState) -> None:
+        """Persist task metadata (expected services, reply queue, flags)."""
+        self._upsert_task(task_id, state)
+        self._remember(task_id, state)
+
+    def save_result(self, task_id: str, state: AggregationState, service: str) -> None:
+        """Persist one service result together with the updated task metadata."""
+        payload = dumps_json(state.results[service]).decode("utf-8")
+        with self.db:
+            self.db.execute("BEGIN")
+            self._upsert_task(task_id, state)
+            self.db.execute(
+                "INSERT OR REPLACE INTO results (task_id, service, payload) VALUES (?, ?, ?)",
+                (task_id, service, payload),
+            )
+        self._remember(task_id, state)
+
+    def delete(self, task_id: str) -> None:
+        self._cache.pop(task_id, None)
+        with self.db:
+            self.db.execute("BEGIN")
+            self.db.execute("DELETE FROM results WHERE task_id = ?", (task_id,))
+            self.db.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    def due(self, now: float | None = None) -> list[str]:
+        """Ids of unpublished tasks whose deadline has passed or whose final publish failed."""
+        now = now if now is not None else time.time()
+        return [
+            task_id
+            for (task_id,) in self.db.execute(
+                "SELECT task_id FROM tasks WHERE due_at IS NOT NULL AND due_at <= ? ORDER BY due_at", (now,)
+            )
+        ]
+
+    def sweep(self, now: float | None = None) -> list[str]:
+        """Remove tasks not updated within the TTL and return their ids."""
+        cutoff = (now if now is not None else time.time()) - self.ttl
+        expired = [
+            task_id for (task_id,) in self.db.execute("SELECT task_id FROM tasks WHERE updated_at < ?", (cutoff,))
+        ]
+        if not expired:
+            return []
+        with self.db:
+            self.db.execute("BEGIN")
+            self.db.executemany("DELETE FROM results WHERE task_id = ?", [(task_id,) for task_id in expired])
+            self.db.executemany("DELETE FROM tasks WHERE task_id = ?", [(task_id,) for task_id in expired])
+        for task_id in expired:
+            self._cache.pop(task_id, None)
+        return expired
+
+    def __len__(self) -> int:
+        (total,) = self.db.execute("SELECT COUNT(*) FROM tasks").fetchone()
+        return total
+
+
+__all__ = ["AggregationState", "StateStore"]
@@ -45,6 +45,15 @@ def _load_extraction(raw_text: str) -> LlmExtraction:
         raise HTTPException(status_code=400, detail=f"Не удалось распарсить ответ LLM: {exc}") from exc
 
 
+def _is_extraction(raw_text: str) -> bool:
+    """Whether a reply parses, so that a rejected one is asked again instead of cached."""
+    try:
+        _load_extraction(raw_text.strip())
+    except HTTPException:
+        return False
+    return True
+
+
 async def run_llm(request: AccountantRequest) -> tuple[LlmExtraction, dict[str, Any]]:
     messages = [
         {
@@ -77,7 +86,7 @@ async def run_llm(request: AccountantRequest) -> tuple[LlmExtraction, dict[str,
         },
     ]
 
-    raw = await client.chat(messages)
+    raw = await client.chat(messages, cache_if=_is_extraction)
     answer = extract_reply(raw)
     extraction = _load_extraction(answer)
     debug = build_debug_info(messages, raw)
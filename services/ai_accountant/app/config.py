@@ -25,12 +25,28 @@ class Settings(BaseSettings):
         alias="OLLAMA_TIMEOUT",
         description="HTTP timeout in seconds for Ollama requests",
     )
+    ollama_connect_timeout: float = Field(
+        default=10.0,
+        alias="OLLAMA_CONNECT_TIMEOUT",
+        description="Seconds to wait for a connection to Ollama",
+    )
+    ollama_max_connections: int = Field(
+        default=8,
+        alias="OLLAMA_MAX_CONNECTIONS",
+        description="Size of the process-wide Ollama connection pool",
+    )
     ollama_num_ctx: Optional[int] = Field(
         default=None,
         alias="OLLAMA_NUM_CTX",
         description="Optional context window size override",
     )
 
+    part_keys: List[str] = Field(
+        default_factory=lambda: ["part_1", "part_4", "part_16"],
+        alias="AI_ACCOUNTANT_PART_KEYS",
+        description="Parts taken from a sliced document envelope",
+    )
+
     cors_allow_origins: List[str] = Field(
         default_factory=lambda: ["*"],
         alias="CORS_ALLOW_ORIGINS",
@@ -42,14 +58,6 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
         case_sensitive = False
 
-    @property
-    def ollama_chat_url(self) -> str:
-        return f"{self.ollama_base_url.rstrip('/')}/api/chat"
-
-    @property
-    def ollama_tags_url(self) -> str:
-        return f"{self.ollama_base_url.rstrip('/')}/api/tags"
-
     def model_post_init(self, __context: object) -> None:  # type: ignore[override]
         if self.ollama_num_ctx is None and self.ollama_model.startswith("qwen3:14b-8k"):
             object.__setattr__(self, "ollama_num_ctx", 65_536)
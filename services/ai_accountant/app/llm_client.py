@@ -1,15 +1,14 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Iterable
-
-import httpx
+from typing import Any, Callable, Iterable
 
 from .config import get_settings
+from .ollama_pool import OllamaPool, get_pool
 
 
 class OllamaClient:
-    """Async client wrapper around Ollama chat endpoints."""
+    """Async client wrapper around Ollama chat endpoints over the process-wide pool."""
 
     def __init__(
         self,
@@ -24,29 +23,29 @@ class OllamaClient:
         self.model = model or settings.ollama_model
         self.timeout = timeout or settings.ollama_timeout
         self.num_ctx = num_ctx if num_ctx is not None else settings.ollama_num_ctx
+        self.pool: OllamaPool = get_pool(
+            self.base_url,
+            timeout=self.timeout,
+            connect_timeout=settings.ollama_connect_timeout,
+            max_connections=settings.ollama_max_connections,
+        )
 
-    async def chat(self, messages: Iterable[dict[str, str]], *, model: str | None = None) -> dict[str, Any]:
-        payload: dict[str, Any] = {
-            "model": model or self.model,
-            "messages": list(messages),
-            "stream": False,
-            "options": {"temperature": 0, "seed": 123},
-        }
+    async def chat(
+        self,
+        messages: Iterable[dict[str, str]],
+        *,
+        model: str | None = None,
+        cache_if: Callable[[str], bool] | None = None,
+    ) -> dict[str, Any]:
+        options: dict[str, Any] = {"temperature": 0, "seed": 123}
         if self.num_ctx:
-            payload["options"]["num_ctx"] = self.num_ctx
+            options["num_ctx"] = self.num_ctx
 
-        settings = get_settings()
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(settings.ollama_chat_url, json=payload)
-            response.raise_for_status()
-            return response.json()
+        reply = await self.pool.chat(messages, model=model or self.model, options=options, cache_if=cache_if)
+        return reply.raw
 
     async def list_models(self) -> dict[str, Any]:
-        settings = get_settings()
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(settings.ollama_tags_url)
-            response.raise_for_status()
-            return response.json()
+        return await self.pool.tags()
 
 
 def extract_reply(data: dict[str, Any]) -> str:
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import router as sections_router
 from app.config import get_settings
+from app.ollama_pool import close_pools
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    await close_pools()
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
-    application = FastAPI(title="Prepared sections review service")
+    application = FastAPI(title="Prepared sections review service", lifespan=lifespan)
     application.add_middleware(
         CORSMiddleware,
         allow_origins=settings.cors_allow_origins,
@@ -20,7 +20,7 @@ class PurchaseAnalyzer:
         """Convert raw sections.json content into a structured spec dictionary."""
         return parse_spec_from_sections(sections_data)
 
-    def analyze(self, spec_data: dict) -> Dict[str, Any]:
+    async def analyze(self, spec_data: dict) -> Dict[str, Any]:
         """Validate spec structure, categorize items, and compute budget sufficiency."""
         budget_data = self.budget_store.load()
         if not budget_data:
@@ -45,7 +45,7 @@ class PurchaseAnalyzer:
         available_categories = list(budget_dict.keys())
 
         item_names = [item["name"] for item in spec_data["items"]]
-        categories_for_items = self.llm_client.categorize_items(item_names, available_categories)
+        categories_for_items = await self.llm_client.categorize_items(item_names, available_categories)
 
         categorized_items_by_category: Dict[str, List[dict]] = {}
         for index, item in enumerate(spec_data["items"]):
@@ -33,7 +33,7 @@ async def analyze_purchases(spec_file: UploadFile = File(..., description="JSON
     except Exception as exc:  # pragma: no cover - unexpected IO errors
         raise HTTPException(status_code=400, detail=f"Ошибка чтения файлов: {exc}") from exc
 
-    return analyzer.analyze(spec_data)
+    return await analyzer.analyze(spec_data)
 
 
 @router.post("/parse-spec")
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -14,8 +14,12 @@ class Settings(BaseSettings):
     ollama_port: str = Field(default="11434", alias="OLLAMA_PORT")
     ollama_model: str = Field(default="qwen3:14b-8k", alias="OLLAMA_MODEL")
     ollama_temperature: float = Field(default=0.1, alias="OLLAMA_TEMPERATURE")
+    # Replies are cached only with OLLAMA_TEMPERATURE=0 and a fixed seed.
+    ollama_seed: Optional[int] = Field(default=None, alias="OLLAMA_SEED")
     ollama_max_tokens: int = Field(default=2000, alias="OLLAMA_MAX_TOKENS")
     ollama_timeout: float = Field(default=60.0, alias="OLLAMA_TIMEOUT")
+    ollama_connect_timeout: float = Field(default=10.0, alias="OLLAMA_CONNECT_TIMEOUT")
+    ollama_max_connections: int = Field(default=8, alias="OLLAMA_MAX_CONNECTIONS")
     ollama_num_ctx: Optional[int] = Field(default=None, alias="OLLAMA_NUM_CTX")
 
     data_dir: Path = Field(
@@ -23,6 +27,8 @@ class Settings(BaseSettings):
         alias="DATA_DIR",
     )
     budget_filename: str = Field(default="budget.json", alias="BUDGET_FILENAME")
+    # Parts taken from a sliced document envelope.
+    part_keys: List[str] = Field(default_factory=lambda: ["part_16"], alias="AI_ECONOM_PART_KEYS")
 
     class Config:
         env_file = ".env"
@@ -34,8 +40,8 @@ class Settings(BaseSettings):
         return self.data_dir / self.budget_filename
 
     @property
-    def ollama_url(self) -> str:
-        return f"http://{self.ollama_host}:{self.ollama_port}/api/chat"
+    def ollama_base_url(self) -> str:
+        return f"http://{self.ollama_host}:{self.ollama_port}"
 
     def model_post_init(self, __context: object) -> None:  # type: ignore[override]
         if self.ollama_num_ctx is None and self.ollama_model.startswith("qwen3:14b-8k"):
@@ -1,13 +1,25 @@
 from __future__ import annotations
 
-"""Lightweight synchronous wrapper for categorizing items via Ollama."""
+"""Lightweight async wrapper for categorizing items via Ollama."""
 
 import json
-from typing import Iterable, List
-
-import requests
+from typing import Any, Iterable, List
 
 from .config import Settings
+from .ollama_pool import get_pool
+
+
+def _json_list(content: str) -> list[Any] | None:
+    """The first JSON array in ``content``, or None when there is none."""
+    start = content.find("[")
+    end = content.rfind("]")
+    if start == -1 or end == -1 or end <= start:
+        return None
+    try:
+        parsed = json.loads(content[start : end + 1].strip())
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, list) else None
 
 
 class LlmClient:
@@ -15,8 +27,14 @@ class LlmClient:
 
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
-
-    def categorize_items(self, item_names: Iterable[str], available_categories: List[str]) -> List[str]:
+        self.pool = get_pool(
+            settings.ollama_base_url,
+            timeout=settings.ollama_timeout,
+            connect_timeout=settings.ollama_connect_timeout,
+            max_connections=settings.ollama_max_connections,
+        )
+
+    async def categorize_items(self, item_names: Iterable[str], available_categories: List[str]) -> List[str]:
         """Ask the LLM to map each item name to one of the allowed categories in order."""
         names = list(item_names)
         if not names:
@@ -49,35 +67,22 @@ class LlmClient:
             "temperature": self.settings.ollama_temperature,
             "num_predict": self.settings.ollama_max_tokens,
         }
+        if self.settings.ollama_seed is not None:
+            options["seed"] = self.settings.ollama_seed
         if self.settings.ollama_num_ctx:
             options["num_ctx"] = self.settings.ollama_num_ctx
 
-        payload = {
-            "model": self.settings.ollama_model,
-            "messages": [{"role": "user", "content": prompt}],
-            "stream": False,
-            "options": options,
-        }
-
         try:
-            response = requests.post(
-                self.settings.ollama_url,
-                json=payload,
-                timeout=self.settings.ollama_timeout,
+            # A reply without a JSON array falls back to default categories
+            # and must not be cached for everyone else.
+            reply = await self.pool.chat(
+                [{"role": "user", "content": prompt}],
+                model=self.settings.ollama_model,
+                options=options,
+                cache_if=lambda content: _json_list(content) is not None,
             )
-            if response.status_code != 200:
-                return categories_result
-
-            result = response.json()
-            content = result.get("message", {}).get("content", "")
-            start = content.find("[")
-            end = content.rfind("]")
-            if start == -1 or end == -1 or end <= start:
-                return categories_result
-
-            json_str = content[start : end + 1].strip()
-            parsed = json.loads(json_str)
-            if not isinstance(parsed, list):
+            parsed = _json_list(reply.content)
+            if parsed is None:
                 return categories_result
 
             cleaned: List[str] = []
@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .api import router
+from .ollama_pool import close_pools
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    await close_pools()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Purchase Analysis API")
+    app = FastAPI(title="Purchase Analysis API", lifespan=lifespan)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Union
+
+import aio_pika
+from aio_pika.abc import AbstractChannel, AbstractExchange, AbstractRobustConnection
+from aio_pika.pool import Pool
+
+from .codec import MessageCodec
+
+
+def shard_queue(queue_name: str, key: str | None, shards: int) -> str:
+    """Name of the per-shard queue (``<queue>.<n>``) that owns ``key``.
+
+    Every producer hashes the task id with the same stable CRC32, so the init
+    message and all results of a task land on the same aggregator replica. With
+    a single shard the plain queue name is used.
+    """
+    if shards <= 1:
+        return queue_name
+    shard = zlib.crc32(key.encode()) % shards if key else 0
+    return f"{queue_name}.{shard}"
+
+
+@dataclass(frozen=True)
+class ExchangeRoute:
+    """Publish target on a durable topic exchange; bound queues receive a copy each.
+
+    ``queues`` are declared and bound to ``routing_key`` before the first
+    publish, so a copy is kept for consumers that have not started yet.
+    """
+
+    exchange: str
+    routing_key: str
+    queues: tuple[str, ...] = ()
+
+    def __str__(self) -> str:
+        return f"{self.exchange}/{self.routing_key}"
+
+
+# A plain string is a queue name on the default exchange.
+Target = Union[str, ExchangeRoute]
+
+
+class RabbitPublisher:
+    """Process-wide AMQP publisher with a reused connection and confirm channels.
+
+    The publisher keeps its own robust connection (separate from the consuming one,
+    so broker flow control on publishes never stalls deliveries), a small pool of
+    channels in publisher-confirm mode and a cache of already declared queues.
+    Messages of one batch are written back to back and their confirms are awaited
+    together instead of paying a broker round trip per message. Messages are
+    published as mandatory: one that no queue receives raises
+    ``aio_pika.exceptions.DeliveryError`` instead of being dropped. Bodies are
+    encoded by ``codec`` (``MESSAGE_FORMAT`` / ``MESSAGE_COMPRESS_THRESHOLD`` by
+    default).
+    """
+
+    def __init__(self, url: str, *, channel_pool_size: int = 4, codec: MessageCodec | None = None) -> None:
+        self.url = url
+        self.channel_pool_size = max(1, channel_pool_size)
+        self.codec = codec or MessageCodec.from_env()
+        self._connection: AbstractRobustConnection | None = None
+        self._channels: Pool[AbstractChannel] | None = None
+        self._declared_queues: set[str] = set()
+        self._declared_exchanges: set[str] = set()
+        self._lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        """Open the shared connection and channel pool once per process."""
+        async with self._lock:
+            if self._connection is not None and not self._connection.is_closed:
+                return
+            self._connection = await aio_pika.connect_robust(self.url)
+            self._channels = Pool(self._open_channel, max_size=self.channel_pool_size)
+            self._declared_queues.clear()
+            self._declared_exchanges.clear()
+
+    async def _open_channel(self) -> AbstractChannel:
+        if self._connection is None:  # pragma: no cover - guarded by connect()
+            raise RuntimeError("Publisher is not connected")
+        return await self._connection.channel(publisher_confirms=True, on_return_raises=True)
+
+    async def _ensure_queue(self, channel: AbstractChannel, queue_name: str) -> None:
+        """Declare a durable queue the first time it is used by this process."""
+        if queue_name in self._declared_queues:
+            return
+        await channel.declare_queue(queue_name, durable=True)
+        self._declared_queues.add(queue_name)
+
+    async def _exchange_for(self, channel: AbstractChannel, target: Target) -> AbstractExchange:
+        """Exchange to publish ``target`` to, declaring named exchanges once per process."""
+        if isinstance(target, str):
+            await self._ensure_queue(channel, target)
+            return channel.default_exchange
+        if target.exchange not in self._declared_exchanges:
+            await channel.declare_exchange(target.exchange, aio_pika.ExchangeType.TOPIC, durable=True)
+            self._declared_exchanges.add(target.exchange)
+        exchange = await channel.get_exchange(target.exchange, ensure=False)
+        for queue_name in target.queues:
+            binding = f"{queue_name}@{target}"
+            if binding not in self._declared_queues:
+                queue = await channel.declare_queue(queue_name, durable=True)
+                await queue.bind(exchange, routing_key=target.routing_key)
+                self._declared_queues.add(binding)
+        return exchange
+
+    def _build_message(
+        self,
+        payload: dict[str, Any],
+        *,
+        correlation_id: str | None,
+        reply_to: str | None,
+    ) -> aio_pika.Message:
+        encoded = self.codec.encode(payload)
+        return aio_pika.Message(
+            body=encoded.body,
+            correlation_id=correlation_id,
+            reply_to=reply_to,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            content_type=encoded.content_type,
+            content_encoding=encoded.content_encoding,
+        )
+
+    async def publish(
+        self,
+        queue_name: str,
+        payload: dict[str, Any],
+        *,
+        correlation_id: str | None,
+        reply_to: str | None,
+    ) -> None:
+        """Publish a single payload to a durable queue and wait for its confirm."""
+        await self.publish_batch(
+            [(queue_name, payload)],
+            correlation_id=correlation_id,
+            reply_to=reply_to,
+        )
+
+    async def publish_batch(
+        self,
+        messages: Iterable[tuple[Target, dict[str, Any]]],
+        *,
+        correlation_id: str | None,
+        reply_to: str | None,
+        on_confirm: Callable[[str, float], None] | None = None,
+    ) -> None:
+        """Publish several payloads on one channel and await their confirms together.
+
+        Targets are queue names or :class:`ExchangeRoute` instances.
+        ``on_confirm(target, seconds)`` is called as each message is confirmed.
+        """
+        batch = list(messages)
+        if not batch:
+            return
+
+        await self.connect()
+        if self._channels is None:  # pragma: no cover - guarded by connect()
+            raise RuntimeError("Publisher is not connected")
+
+        async with self._channels.acquire() as channel:
+            exchanges = {
+                target: await self._exchange_for(channel, target)
+                for target in dict.fromkeys(target for target, _ in batch)
+            }
+
+            started = time.perf_counter()
+
+            async def publish_one(target: Target, payload: dict[str, Any]) -> None:
+                await exchanges[target].publish(
+                    self._build_message(payload, correlation_id=correlation_id, reply_to=reply_to),
+                    routing_key=target if isinstance(target, str) else target.routing_key,
+                    mandatory=True,
+                )
+                if on_confirm is not None:
+                    on_confirm(str(target), time.perf_counter() - started)
+
+            await asyncio.gather(*(publish_one(target, payload) for target, payload in batch))
+
+    async def close(self) -> None:
+        """Release pooled channels and the shared connection."""
+        async with self._lock:
+            if self._channels is not None:
+                await self._channels.close()
+                self._channels = None
+            if self._connection is not None:
+                await self._connection.close()
+                self._connection = None
+            self._declared_queues.clear()
+            self._declared_exchanges.clear()
+
+
+__all__ = ["ExchangeRoute", "RabbitPublisher", "Target", "shard_queue"]
@@ -48,6 +48,7 @@ async def review_prepared_sections(
         prepared.document_html,
         expected_titles=prepared.titles,
         expected_numbers=prepared.numbers,
+        sections=prepared.sections,
     )
 
     return FullProcessingResponse(
@@ -72,6 +73,7 @@ async def review_full(
         prepared.document_html,
         expected_titles=prepared.titles,
         expected_numbers=prepared.numbers,
+        sections=prepared.sections,
     )
 
     return FullProcessingResponse(
@@ -25,12 +25,65 @@ class Settings(BaseSettings):
         alias="OLLAMA_TIMEOUT",
         description="HTTP timeout in seconds for Ollama requests",
     )
+    ollama_connect_timeout: float = Field(
+        default=10.0,
+        alias="OLLAMA_CONNECT_TIMEOUT",
+        description="Seconds to wait for a connection to Ollama",
+    )
+    ollama_max_connections: int = Field(
+        default=8,
+        alias="OLLAMA_MAX_CONNECTIONS",
+        description="Size of the process-wide Ollama connection pool",
+    )
     ollama_num_ctx: Optional[int] = Field(
         default=None,
         alias="OLLAMA_NUM_CTX",
         description="Optional context window size override",
     )
 
+    review_mode: str = Field(
+        default="single",
+        alias="AI_LEGAL_REVIEW_MODE",
+        description="single: one prompt for the whole contract; sections: map-reduce over section groups",
+    )
+    review_group_tokens: int = Field(
+        default=3000,
+        alias="AI_LEGAL_REVIEW_GROUP_TOKENS",
+        description="Approximate prompt tokens of sections reviewed in one call in sections mode",
+    )
+    review_concurrency: int = Field(
+        default=4,
+        alias="AI_LEGAL_REVIEW_CONCURRENCY",
+        description="Section groups reviewed at once; match OLLAMA_NUM_PARALLEL",
+    )
+    review_num_ctx: int = Field(
+        default=8192,
+        alias="AI_LEGAL_REVIEW_NUM_CTX",
+        description="Context window of the per-section and summary calls",
+    )
+    review_reply_tokens: int = Field(
+        default=2048,
+        alias="AI_LEGAL_REVIEW_REPLY_TOKENS",
+        description="Context kept free for the reply; a larger group prompt raises num_ctx for its call",
+    )
+    review_reduce: str = Field(
+        default="llm",
+        alias="AI_LEGAL_REVIEW_REDUCE",
+        description="llm: summarize INACCURACY/RED_FLAGS in one short call; merge: join per-group findings",
+    )
+
+    instruction_layout: str = Field(
+        default="shared",
+        alias="AI_LEGAL_INSTRUCTION_LAYOUT",
+        description="shared: common instruction once plus per-section additions; per_section: full text before each section",
+    )
+
+    part_keys: Optional[List[str]] = Field(
+        default=None,
+        alias="AI_LEGAL_PART_KEYS",
+        description="Parts taken from a sliced document envelope; all parts when unset",
+    )
+
     cors_allow_origins: List[str] = Field(
         default_factory=lambda: ["*"],
         alias="CORS_ALLOW_ORIGINS",
@@ -42,14 +95,6 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
         case_sensitive = False
 
-    @property
-    def ollama_chat_url(self) -> str:
-        return f"{self.ollama_base_url.rstrip('/')}/api/chat"
-
-    @property
-    def ollama_tags_url(self) -> str:
-        return f"{self.ollama_base_url.rstrip('/')}/api/tags"
-
     def model_post_init(self, __context: object) -> None:  # type: ignore[override]
         if self.ollama_num_ctx is None and self.ollama_model.startswith("qwen3:14b-8k"):
             object.__setattr__(self, "ollama_num_ctx", 65_536)
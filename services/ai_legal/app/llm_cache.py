@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def request_key(namespace: str, payload: dict[str, Any]) -> str:
+    """Stable key of an LLM request: model, messages and every option, scoped by ``namespace``."""
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{namespace}\0{canonical}".encode("utf-8")).hexdigest()
+
+
+class LlmCache:
+    """Memoizes LLM responses: an in-memory LRU in front of a SQLite file.
+
+    The database may sit on a volume shared by several services, so a prompt
+    answered once is not sent to the GPU again by anyone. Entries expire after
+    ``ttl`` seconds; the least recently used ones are removed when the file
+    holds more than ``max_bytes``. ``namespace`` (model build or prompt
+    revision) is part of every key, so bumping it retires all old entries.
+    Concurrent requests for the same key share one in-flight call.
+    """
+
+    def __init__(
+        self,
+        path: Path | None,
+        *,
+        namespace: str = "1",
+        ttl: float = 7 * 24 * 3600,
+        max_bytes: int = 512 * 1024 * 1024,
+        memory_entries: int = 256,
+        prune_interval: float = 300.0,
+    ) -> None:
+        self.path = Path(path) if path else None
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.prune_interval = prune_interval
+        self._memory: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future[dict[str, Any]]] = {}
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        self._db_failed = False
+        self._last_prune = 0.0
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "shared": 0, "misses": 0, "stores": 0}
+
+    @classmethod
+    def from_env(cls) -> "LlmCache | None":
+        if os.getenv("LLM_CACHE_ENABLED", "true").lower() not in {"1", "true", "yes"}:
+            return None
+        path = os.getenv("LLM_CACHE_PATH", "/llm_cache/llm_cache.sqlite3")
+        return cls(
+            Path(path) if path else None,
+            namespace=os.getenv("LLM_CACHE_VERSION", "1"),
+            ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+            max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(512 * 1024 * 1024))),
+            memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256")),
+        )
+
+    def key(self, payload: dict[str, Any]) -> str:
+        return request_key(self.namespace, payload)
+
+    async def get_or_call(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[dict[str, Any]]],
+        *,
+        store: Callable[[dict[str, Any]], bool] | None = None,
+    ) -> tuple[dict[str, Any], bool]:
+        """Return ``(value, cached)``; ``call`` runs at most once per key at a time.
+
+        Failures are not cached and reach every caller waiting on the same key.
+        A value rejected by ``store`` is returned (also to those callers) but
+        not kept, so the next request for the key is sent again.
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value, True
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.counters["shared"] += 1
+            try:
+                return await asyncio.shield(pending), True
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The caller that owned the request was cancelled, not this one.
+                return await self.get_or_call(key, call, store=store)
+
+        future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved when nobody else was waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if store is None or store(value):
+                await self.put(key, value)
+            return value, False
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            value, created_at = entry
+            if now - created_at <= self.ttl:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return value
+            del self._memory[key]
+
+        row = await asyncio.to_thread(self._read, key, now)
+        if row is None:
+            self.counters["misses"] += 1
+            return None
+        value, created_at = row
+        self._remember(key, value, created_at)
+        self.counters["disk_hits"] += 1
+        return value
+
+    async def put(self, key: str, value: dict[str, Any]) -> None:
+        created_at = time.time()
+        self._remember(key, value, created_at)
+        self.counters["stores"] += 1
+        await asyncio.to_thread(self._write, key, value, created_at)
+
+    def _remember(self, key: str, value: dict[str, Any], created_at: float) -> None:
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _connection(self) -> sqlite3.Connection | None:
+        if self._db is not None or self._db_failed or self.path is None:
+            return self._db
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, timeout=10.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+        except (OSError, sqlite3.Error):
+            # Without a writable volume the cache still works in memory.
+            logger.warning("LLM cache database %s is unavailable; caching in memory only", self.path, exc_info=True)
+            self._db_failed = True
+            return None
+        self._db = db
+        return db
+
+    def _read(self, key: str, now: float) -> tuple[dict[str, Any], float] | None:
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return None
+            try:
+                row = db.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ? AND created_at >= ?",
+                    (key, now - self.ttl),
+                ).fetchone()
+                if row is None:
+                    return None
+                db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                return json.loads(row[0]), row[1]
+            except (sqlite3.Error, ValueError):
+                logger.warning("Ignoring unreadable LLM cache entry %s", key, exc_info=True)
+                return None
+
+    def _write(self, key: str, value: dict[str, Any], created_at: float) -> None:
+        body = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, namespace, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, self.namespace, body, len(body), created_at, created_at),
+                )
+                if time.monotonic() - self._last_prune >= self.prune_interval:
+                    self._prune(db, created_at)
+            except sqlite3.Error:
+                logger.warning("Failed to store LLM cache entry %s", key, exc_info=True)
+
+    def _prune(self, db: sqlite3.Connection, now: float) -> None:
+        """Drop expired rows, then least recently used ones until under ``max_bytes``."""
+        self._last_prune = time.monotonic()
+        db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        (total,) = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims: list[str] = []
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if excess <= 0:
+                break
+            victims.append(key)
+            excess -= size
+        db.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key in victims])
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.counters, "memory_entries": len(self._memory), "inflight": len(self._inflight)}
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+__all__ = ["LlmCache", "request_key"]
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Iterable
+
+import httpx
+
+from .llm_cache import LlmCache
+
+logger = logging.getLogger(__name__)
+
+_NANOSECONDS = 1e9
+
+
+@dataclass(frozen=True, slots=True)
+class OllamaTimings:
+    """Token counts and durations (seconds) reported by Ollama for one call."""
+
+    prompt_eval_count: int | None = None
+    eval_count: int | None = None
+    prompt_eval_duration: float | None = None
+    eval_duration: float | None = None
+    load_duration: float | None = None
+    total_duration: float | None = None
+
+    @classmethod
+    def from_response(cls, data: Any) -> "OllamaTimings":
+        if not isinstance(data, dict):
+            return cls()
+
+        def seconds(key: str) -> float | None:
+            value = data.get(key)
+            return value / _NANOSECONDS if isinstance(value, (int, float)) else None
+
+        return cls(
+            prompt_eval_count=data.get("prompt_eval_count"),
+            eval_count=data.get("eval_count"),
+            prompt_eval_duration=seconds("prompt_eval_duration"),
+            eval_duration=seconds("eval_duration"),
+            load_duration=seconds("load_duration"),
+            total_duration=seconds("total_duration"),
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class OllamaReply:
+    """Raw Ollama response with its text, the endpoint used and call timings.
+
+    For a ``cached`` reply ``timings`` describe the original generation and
+    ``elapsed`` the lookup.
+    """
+
+    raw: dict[str, Any]
+    content: str
+    endpoint: str
+    elapsed: float
+    timings: OllamaTimings
+    cached: bool = False
+
+
+def _generate_payload(chat_payload: dict[str, Any]) -> dict[str, Any]:
+    """Translate a /api/chat request into the older /api/generate shape."""
+    messages = chat_payload.get("messages") or []
+    system = "\n\n".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    prompt = "\n\n".join(m.get("content", "") for m in messages if m.get("role") != "system")
+    payload = {key: value for key, value in chat_payload.items() if key != "messages"}
+    payload["prompt"] = prompt
+    if system:
+        payload["system"] = system
+    return payload
+
+
+class OllamaPool:
+    """Process-wide async client for one Ollama host.
+
+    A single ``httpx.AsyncClient`` keeps connections alive between calls
+    instead of opening one per request. Whether the host serves ``/api/chat``
+    is learnt once: the first 404 that is not about a missing model switches
+    the process to ``/api/generate`` for good. With a ``cache`` identical
+    deterministic requests (``temperature`` 0 and a fixed ``seed``) are
+    answered from it, and concurrent ones share a single call.
+    Token counts and durations of every reply are kept in :attr:`totals`.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        timeout: float = 120.0,
+        connect_timeout: float = 10.0,
+        max_connections: int = 16,
+        max_keepalive: int = 8,
+        keepalive_expiry: float = 300.0,
+        cache: LlmCache | None = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.chat_api: bool | None = None
+        self.totals: dict[str, float] = {
+            "calls": 0,
+            "cached": 0,
+            "prompt_eval_count": 0,
+            "eval_count": 0,
+            "prompt_eval_duration": 0.0,
+            "eval_duration": 0.0,
+            "elapsed": 0.0,
+        }
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # httpx connections belong to the loop that opened them; a new loop
+        # (another asyncio.run) gets a fresh client.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                trust_env=False,
+            )
+            self._loop = loop
+        return self._client
+
+    async def chat(
+        self,
+        messages: Iterable[dict[str, str]],
+        *,
+        model: str,
+        options: dict[str, Any] | None = None,
+        timeout: httpx.Timeout | float | None = None,
+        use_cache: bool = True,
+        cache_if: Callable[[str], bool] | None = None,
+        **extra: Any,
+    ) -> OllamaReply:
+        """Run a non-streaming chat completion, via /api/generate on older hosts.
+
+        Only deterministic calls are cached: a sampled reply would pin one
+        random draw for the whole TTL. The cache key covers the model, the
+        messages and every option (``temperature``, ``seed``, ``num_ctx``...).
+        A reply whose content ``cache_if`` rejects (one the caller could not
+        parse) is returned but not stored. Transport errors and
+        ``httpx.HTTPStatusError`` propagate unchanged and are never cached.
+        """
+        payload: dict[str, Any] = {"model": model, "messages": list(messages), "stream": False, **extra}
+        if options:
+            payload["options"] = options
+        request_timeout = timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+
+        started = time.perf_counter()
+        if self.cache is None or not use_cache or not _deterministic(options):
+            result, cached = await self._request(payload, request_timeout), False
+        else:
+            def store(result: dict[str, Any]) -> bool:
+                return cache_if is None or cache_if(_content(result["response"], result["endpoint"]))
+
+            result, cached = await self.cache.get_or_call(
+                self.cache.key(payload), lambda: self._request(payload, request_timeout), store=store
+            )
+        return self._reply(result["response"], result["endpoint"], started, cached)
+
+    async def _request(self, payload: dict[str, Any], timeout: Any) -> dict[str, Any]:
+        if self.chat_api is not False:
+            response = await self.client.post("/api/chat", json=payload, timeout=timeout)
+            if response.status_code == 404 and not _is_missing_model(response):
+                self.chat_api = False
+                logger.info("%s has no /api/chat; using /api/generate from now on", self.base_url)
+            else:
+                response.raise_for_status()
+                self.chat_api = True
+                return {"endpoint": "chat", "response": response.json()}
+
+        response = await self.client.post("/api/generate", json=_generate_payload(payload), timeout=timeout)
+        response.raise_for_status()
+        return {"endpoint": "generate", "response": response.json()}
+
+    def _reply(self, data: dict[str, Any], endpoint: str, started: float, cached: bool) -> OllamaReply:
+        elapsed = time.perf_counter() - started
+        timings = OllamaTimings.from_response(data)
+        content = _content(data, endpoint)
+        self.totals["calls"] += 1
+        self.totals["elapsed"] += elapsed
+        if cached:
+            self.totals["cached"] += 1
+        else:
+            for key in ("prompt_eval_count", "eval_count", "prompt_eval_duration", "eval_duration"):
+                self.totals[key] += getattr(timings, key) or 0
+        logger.debug(
+            "Ollama %s%s: %.2fs, prompt %s tokens, eval %s tokens in %.2fs",
+            endpoint,
+            " (cached)" if cached else "",
+            elapsed,
+            timings.prompt_eval_count,
+            timings.eval_count,
+            timings.eval_duration or 0.0,
+        )
+        return OllamaReply(
+            raw=data, content=content, endpoint=endpoint, elapsed=elapsed, timings=timings, cached=cached
+        )
+
+    async def tags(self) -> dict[str, Any]:
+        response = await self.client.get("/api/tags")
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _deterministic(options: dict[str, Any] | None) -> bool:
+    """Whether a call with these options always yields the same reply."""
+    return bool(options) and options.get("temperature") == 0 and options.get("seed") is not None
+
+
+def _content(data: dict[str, Any], endpoint: str) -> str:
+    if endpoint == "chat":
+        return str((data.get("message") or {}).get("content") or "")
+    return str(data.get("response") or "")
+
+
+def _is_missing_model(response: httpx.Response) -> bool:
+    """A 404 for an unknown model must not disable /api/chat."""
+    try:
+        error = str(response.json().get("error", ""))
+    except Exception:
+        return False
+    return "model" in error.lower()
+
+
+_pools: dict[str, OllamaPool] = {}
+_caches: list[LlmCache] = []
+
+
+def _shared_cache() -> LlmCache | None:
+    """The process-wide response cache configured by ``LLM_CACHE_*``, if enabled."""
+    if not _caches:
+        cache = LlmCache.from_env()
+        if cache is None:
+            return None
+        _caches.append(cache)
+    return _caches[0]
+
+
+def get_pool(base_url: str, **options: Any) -> OllamaPool:
+    """Shared pool for ``base_url``; ``options`` apply when it is first created."""
+    key = base_url.rstrip("/")
+    pool = _pools.get(key)
+    if pool is None:
+        options.setdefault("cache", _shared_cache())
+        pool = _pools[key] = OllamaPool(key, **options)
+    return pool
+
+
+async def close_pools() -> None:
+    for pool in _pools.values():
+        await pool.aclose()
+    for cache in _caches:
+        cache.close()
+
+
+__all__ = ["OllamaPool", "OllamaReply", "OllamaTimings", "close_pools", "get_pool"]
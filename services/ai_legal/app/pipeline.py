@@ -5,7 +5,13 @@ from dataclasses import dataclass
 
 from fastapi import HTTPException
 
-from .sections import build_chunks_from_payload, build_sections_instruction, render_document_html
+from .sections import (
+    SectionChunk,
+    build_chunks_from_payload,
+    build_sections_instruction,
+    render_document_html,
+    section_label,
+)
 
 
 @dataclass(slots=True)
@@ -16,6 +22,7 @@ class SectionPreparation:
     titles: list[str]
     numbers: list[int | None]
     document_html: str
+    sections: list[SectionChunk]
 
 
 class SectionPipeline:
@@ -53,12 +60,7 @@ class SectionPipeline:
         sections, specification_text = build_chunks_from_payload(payload)
         combined_text = build_sections_instruction(sections)
         document_html = render_document_html(sections, specification_text)
-        titles = [
-            "Шапка" if section.number is None and not section.is_specification else (
-                "Спецификация" if section.is_specification else f"Раздел {section.number}"
-            )
-            for section in sections
-        ]
+        titles = [section_label(section) for section in sections]
         numbers = [section.number for section in sections]
         return SectionPreparation(
             combined_text=combined_text,
@@ -66,6 +68,7 @@ class SectionPipeline:
             titles=titles,
             numbers=numbers,
             document_html=document_html,
+            sections=sections,
         )
 
     def prepare_from_text(self, payload: str) -> SectionPreparation:
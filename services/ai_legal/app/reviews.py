@@ -1,14 +1,27 @@
 from __future__ import annotations
 
+import asyncio
 import html
 import json
+import logging
 import math
 import re
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Any, Iterable
 
+from .config import get_settings
 from .llm_client import build_debug_info, client, extract_reply, OllamaClient
 from .schemas import LlmDebugInfo, SectionReview
+from .sections import (
+    SectionChunk,
+    build_sections_instruction,
+    estimate_tokens,
+    group_sections,
+    prompt_composition,
+    section_label,
+)
+
+logger = logging.getLogger(__name__)
 
 _SYSTEM_PROMPT = (
     "Ты юрист. Твоя задача — проанализировать шапку, каждый раздел документа и спецификацию "
@@ -66,6 +79,21 @@ _SYSTEM_PROMPT = (
     "- Сейчас декабрь 2025 года.\n"
 )
 
+_SUMMARY_PROMPT = (
+    "Ты юрист. Разделы договора уже проверены по отдельности. Ниже краткие выводы по каждому "
+    "разделу и замечания, найденные при проверке.\n\n"
+    "Верни ОДИН JSON-объект строго вида {\"INACCURACY\": \"строка\", \"RED_FLAGS\": \"строка\"}.\n\n"
+    "- INACCURACY — все неточности, замечания и несоответствия, даже некритические, через '; '.\n"
+    "- RED_FLAGS — только критические ошибки:\n"
+    "    1) расхождение общей суммы в разных местах документа;\n"
+    "    2) расхождение информации о сторонах (Покупатель / Поставщик).\n"
+    "    3) некорректный НДС (либо не указан явно), странные требования, неверные сроки и т.п.) \n"
+    "    4) 100% предоплата это риск \n"
+    "- Сопоставляй выводы разных разделов между собой: суммы, стороны, сроки.\n"
+    "- Если замечаний нет — пустая строка \"\". Массивы и объекты запрещены.\n"
+    "- Возвращай ТОЛЬКО JSON без пояснений и без оформления ```json```.\n"
+)
+
 
 
 def _build_alignment_instruction(titles: list[str]) -> str:
@@ -211,6 +239,91 @@ def _normalize_reviews(
     return normalized
 
 
+_NOT_REVIEWED = "Раздел не проверен"
+
+
+def _unreviewed(titles: list[str], numbers: list[int | None]) -> list[SectionReview]:
+    """Placeholders for sections whose review call failed; they carry no score."""
+    return [
+        SectionReview(number=number, title=title, resume=_NOT_REVIEWED, risks=_NOT_REVIEWED, score="-")
+        for title, number in zip(titles, numbers)
+    ]
+
+
+def _is_reviewed(review: SectionReview) -> bool:
+    return review.resume != _NOT_REVIEWED
+
+
+def _join_findings(findings: Iterable[str | None]) -> str | None:
+    """Join per-group findings with '; ', dropping empties and repeats."""
+    seen: dict[str, None] = {}
+    for finding in findings:
+        for item in (finding or "").split(";"):
+            item = item.strip()
+            if item:
+                seen.setdefault(item, None)
+    return "; ".join(seen) or None
+
+
+def _build_summary_input(
+    reviews: list[SectionReview], inaccuracy: str | None, red_flags: str | None
+) -> str:
+    lines = [
+        f"{review.title}: оценка {review.score}. Резюме: {review.resume} Риски: {review.risks}"
+        for review in reviews
+        if _is_reviewed(review)
+    ]
+    lines.append("")
+    lines.append(f"Неточности по разделам: {inaccuracy or 'нет'}")
+    lines.append(f"Критические ошибки по разделам: {red_flags or 'нет'}")
+    return "\n".join(lines)
+
+
+def _measure_prompt(messages: list[dict[str, str]], sections: list[SectionChunk]) -> dict[str, int]:
+    system = sum(estimate_tokens(m["content"]) for m in messages if m["role"] == "system")
+    return {"system": system, **prompt_composition(sections)}
+
+
+def _log_prompt_composition(
+    composition: dict[str, int], sections: int, calls: int, evaluated: int | None
+) -> None:
+    """Log where the prompt tokens of one document go; evaluated is Ollama's own count."""
+    logger.info(
+        "Review prompt for %d sections in %d call(s): ~%d tokens (system %d, instructions %d, "
+        "content %d, spec %d); Ollama evaluated %s",
+        sections,
+        calls,
+        sum(composition.values()),
+        composition["system"],
+        composition["instructions"],
+        composition["content"],
+        composition["spec"],
+        evaluated if evaluated is not None else "n/a",
+    )
+
+
+def _prompt_eval_count(raw: dict[str, Any]) -> int | None:
+    value = raw.get("prompt_eval_count") if isinstance(raw, dict) else None
+    return value if isinstance(value, int) else None
+
+
+def _extract_json_object(text: str) -> str:
+    match = re.search(r"\{[\s\S]*\}", text)
+    return match.group(0) if match else text
+
+
+def _has_reviews(text: str) -> bool:
+    """Whether a review reply holds section items, i.e. is worth caching."""
+    return bool(_extract_response_payload(text.strip())[0])
+
+
+def _has_json_object(text: str) -> bool:
+    try:
+        return isinstance(json.loads(_extract_json_object(text)), dict)
+    except ValueError:
+        return False
+
+
 def _extract_numeric_score(score: str) -> float | None:
     match = re.search(r"([0-9]+(?:[\.,][0-9]+)?)", score)
     if not match:
@@ -222,7 +335,11 @@ def _extract_numeric_score(score: str) -> float | None:
 
 
 def _calculate_average_score(reviews: list[SectionReview]) -> float | None:
-    values = [value for review in reviews if (value := _extract_numeric_score(review.score)) is not None]
+    values = [
+        value
+        for review in reviews
+        if _is_reviewed(review) and (value := _extract_numeric_score(review.score)) is not None
+    ]
     if not values:
         return None
     return round(sum(values) / len(values), 2)
@@ -376,10 +493,20 @@ class SectionReviewResult:
 
 
 class SectionReviewService:
-    """Run LLM review for sections and render a concise HTML report."""
+    """Run LLM review for sections and render a concise HTML report.
+
+    With ``AI_LEGAL_REVIEW_MODE=sections`` and the parsed ``sections`` at hand,
+    groups of sections within ``review_group_tokens`` are reviewed in
+    concurrent calls with a small context window, and document-level
+    INACCURACY/RED_FLAGS come from one short summary call over the
+    per-section results (or are merged in code).
+    """
 
     def __init__(self, llm_client: OllamaClient | None = None) -> None:
         self._client = llm_client or client
+        # Shared by all documents, so AI_LEGAL_REVIEW_CONCURRENCY bounds the
+        # calls of the process rather than of one request.
+        self._semaphore = asyncio.Semaphore(max(1, get_settings().review_concurrency))
 
     async def evaluate_sections(
         self,
@@ -388,8 +515,12 @@ class SectionReviewService:
         *,
         expected_titles: list[str] | None = None,
         expected_numbers: list[int | None] | None = None,
+        sections: list[SectionChunk] | None = None,
     ) -> SectionReviewResult:
         """Request section-by-section feedback and collect debug/context metadata."""
+        if sections and get_settings().review_mode == "sections":
+            return await self._evaluate_by_groups(sections, document_html)
+
         titles = expected_titles or _parse_titles(content)
         messages = [
             {"role": "system", "content": _SYSTEM_PROMPT},
@@ -397,13 +528,139 @@ class SectionReviewService:
             {"role": "user", "content": content},
         ]
 
-        raw = await self._client.chat(messages)
+        raw = await self._client.chat(messages, cache_if=_has_reviews)
+        if sections:
+            _log_prompt_composition(
+                _measure_prompt(messages, sections), len(sections), 1, _prompt_eval_count(raw)
+            )
         debug = build_debug_info(messages, raw)
         reply = extract_reply(raw)
         raw_items, inaccuracy, red_flags = _extract_response_payload(reply)
         if not raw_items and titles:
             raw_items = [{} for _ in titles]
         reviews = _normalize_reviews(raw_items, titles, expected_numbers)
+        return self._build_result(reviews, inaccuracy, red_flags, document_html, debug)
+
+    async def _evaluate_by_groups(
+        self, sections: list[SectionChunk], document_html: str | None
+    ) -> SectionReviewResult:
+        settings = get_settings()
+        groups = group_sections(sections, settings.review_group_tokens)
+        outcomes = await asyncio.gather(
+            *(self._review_group(group, self._semaphore, settings.review_num_ctx) for group in groups),
+            return_exceptions=True,
+        )
+        failures = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+        if failures and len(failures) == len(outcomes):
+            raise failures[0]
+
+        reviews: list[SectionReview] = []
+        inaccuracies: list[str | None] = []
+        red_flags: list[str | None] = []
+        calls: list[dict[str, Any]] = []
+        composition = {"system": 0, "instructions": 0, "content": 0, "spec": 0}
+        evaluated: int | None = None
+        unreviewed: list[str] = []
+        for group, outcome in zip(groups, outcomes):
+            titles = [section_label(section) for section in group]
+            numbers = [section.number for section in group]
+            if isinstance(outcome, BaseException):
+                # Not padded with default scores: the sections stay out of the
+                # average and the summary, and the gap is reported.
+                logger.warning("Review of %s failed: %s", ", ".join(titles), outcome)
+                reviews.extend(_unreviewed(titles, numbers))
+                unreviewed.extend(titles)
+            else:
+                messages, raw = outcome
+                calls.append({"messages": messages, "response": raw})
+                for key, tokens in _measure_prompt(messages, group).items():
+                    composition[key] += tokens
+                if (count := _prompt_eval_count(raw)) is not None:
+                    evaluated = (evaluated or 0) + count
+                items, group_inaccuracy, group_flags = _extract_response_payload(extract_reply(raw))
+                inaccuracies.append(group_inaccuracy)
+                red_flags.append(group_flags)
+                reviews.extend(_normalize_reviews(items[: len(group)], titles, numbers))
+
+        _log_prompt_composition(composition, len(sections), len(calls), evaluated)
+        inaccuracy, red_flag = _join_findings(inaccuracies), _join_findings(red_flags)
+        if settings.review_reduce == "llm":
+            inaccuracy, red_flag = await self._summarize(reviews, inaccuracy, red_flag, calls)
+        if unreviewed:
+            inaccuracy = _join_findings([f"Разделы не проверены: {', '.join(unreviewed)}", inaccuracy])
+
+        debug = build_debug_info(
+            [message for call in calls for message in call["messages"]],
+            {"calls": [call["response"] for call in calls]},
+        )
+        return self._build_result(reviews, inaccuracy, red_flag, document_html, debug)
+
+    async def _review_group(
+        self, group: list[SectionChunk], semaphore: asyncio.Semaphore, num_ctx: int
+    ) -> tuple[list[dict[str, str]], dict[str, Any]]:
+        content = build_sections_instruction(group)
+        messages = [
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "system", "content": _build_alignment_instruction([section_label(s) for s in group])},
+            {"role": "user", "content": content},
+        ]
+        settings = get_settings()
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        needed = prompt_tokens + settings.review_reply_tokens
+        if needed > num_ctx:
+            # An oversized section (a long specification) sits alone in its
+            # group; Ollama would cut its prompt, so the window grows instead,
+            # in whole steps of num_ctx to keep the number of model variants low.
+            limit = max(num_ctx, settings.ollama_num_ctx or 0)
+            num_ctx = min(-(-needed // num_ctx) * num_ctx, limit)
+            logger.info(
+                "Review prompt for %s is ~%d tokens; num_ctx raised to %d",
+                section_label(group[0]),
+                prompt_tokens,
+                num_ctx,
+            )
+            if needed > num_ctx:
+                logger.warning(
+                    "Review prompt for %s is ~%d tokens, above the largest context %d",
+                    section_label(group[0]),
+                    prompt_tokens,
+                    num_ctx,
+                )
+        async with semaphore:
+            raw = await self._client.chat(messages, num_ctx=num_ctx, cache_if=_has_reviews)
+        return messages, raw
+
+    async def _summarize(
+        self,
+        reviews: list[SectionReview],
+        inaccuracy: str | None,
+        red_flags: str | None,
+        calls: list[dict[str, Any]],
+    ) -> tuple[str | None, str | None]:
+        """Cross-check per-section results for document-level findings; keeps the merged ones on failure."""
+        messages = [
+            {"role": "system", "content": _SUMMARY_PROMPT},
+            {"role": "user", "content": _build_summary_input(reviews, inaccuracy, red_flags)},
+        ]
+        try:
+            raw = await self._client.chat(
+                messages, num_ctx=get_settings().review_num_ctx, cache_if=_has_json_object
+            )
+            parsed = json.loads(_extract_json_object(extract_reply(raw)))
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("Review summary failed, using merged section findings: %s", exc)
+            return inaccuracy, red_flags
+        calls.append({"messages": messages, "response": raw})
+        return _coerce_inaccuracy(parsed), _coerce_red_flags(parsed)
+
+    @staticmethod
+    def _build_result(
+        reviews: list[SectionReview],
+        inaccuracy: str | None,
+        red_flags: str | None,
+        document_html: str | None,
+        debug: LlmDebugInfo | None,
+    ) -> SectionReviewResult:
         average_score = _calculate_average_score(reviews)
         html_report = _build_html_report(
             reviews,
@@ -9,8 +9,13 @@ from typing import Iterable
 
 from fastapi import HTTPException
 
+from .config import get_settings
+
 INSTRUCTIONS_DIR = Path(__file__).resolve().parent / "instructions"
 
+# Rough characters per token of the Qwen tokenizer on Russian legal text.
+_CHARS_PER_TOKEN = 3.5
+
 
 @dataclass(slots=True)
 class SectionChunk:
@@ -105,38 +110,151 @@ def build_chunks_from_payload(payload: str | dict[str, str]) -> tuple[list[Secti
     return sections, specification_text
 
 
-def _load_instruction_text(number: int | None) -> str | None:
-    index = number or 0
-    path = INSTRUCTIONS_DIR / f"{index}.txt"
-    try:
-        if path.exists():
-            return path.read_text(encoding="utf-8").strip()
-    except OSError:
-        return None
-    return None
+def estimate_tokens(text: str) -> int:
+    """Approximate prompt size in tokens; used for budgets, not billing."""
+    return int(len(text) / _CHARS_PER_TOKEN) + 1
+
+
+def section_label(section: SectionChunk) -> str:
+    if section.is_specification:
+        return "Спецификация"
+    return "Шапка" if section.number is None else f"Раздел {section.number}"
+
+
+def _instruction_lines(text: str) -> list[str]:
+    """Instruction text as trimmed lines, one sentence per line, without blank lines."""
+    lines: list[str] = []
+    for line in text.splitlines():
+        for sentence in re.split(r"(?<=[.!?])\s+", line.strip()):
+            if sentence.strip():
+                lines.append(sentence.strip())
+    return lines
+
+
+@dataclass(frozen=True, slots=True)
+class InstructionSet:
+    """Section instructions read once and split into a shared preamble and per-section deltas.
+
+    Lines found in every file go into ``preamble``, stated once per prompt,
+    and ``deltas`` keep the rest of each file, so no section receives a line
+    its own instruction does not have. ``texts`` holds the full files for
+    the old layout that repeats the whole instruction before every section.
+    """
+
+    texts: dict[int, str]
+    preamble: str
+    deltas: dict[int, str]
+
+    @classmethod
+    def load(cls, directory: Path) -> "InstructionSet":
+        texts: dict[int, str] = {}
+        try:
+            paths = sorted(directory.glob("*.txt"))
+        except OSError:
+            paths = []
+        for path in paths:
+            if path.stem.isdigit():
+                try:
+                    texts[int(path.stem)] = path.read_text(encoding="utf-8").strip()
+                except OSError:
+                    continue
+
+        lines = {index: _instruction_lines(text) for index, text in sorted(texts.items())}
+        counts: dict[str, int] = {}
+        for file_lines in lines.values():
+            for line in set(file_lines):
+                counts[line] = counts.get(line, 0) + 1
+        shared = {line for line, count in counts.items() if count == len(lines)}
+
+        # Follow the file that has the most shared lines, so the preamble reads like one instruction.
+        ordered = sorted(lines.values(), key=lambda file_lines: -len(shared.intersection(file_lines)))
+        preamble: list[str] = []
+        for file_lines in ordered:
+            for line in file_lines:
+                if line in shared and line not in preamble:
+                    preamble.append(line)
+        deltas = {
+            index: "\n".join(line for line in file_lines if line not in shared)
+            for index, file_lines in lines.items()
+        }
+        return cls(texts=texts, preamble="\n".join(preamble), deltas=deltas)
+
+    def text(self, number: int | None) -> str | None:
+        return self.texts.get(number or 0)
+
+    def delta(self, number: int | None) -> str | None:
+        return self.deltas.get(number or 0) or None
+
+
+# Read at import: prompts are built for every document.
+INSTRUCTIONS = InstructionSet.load(INSTRUCTIONS_DIR)
+
+
+def _instruction_index(section: SectionChunk) -> int | None:
+    return 16 if section.is_specification else section.number
+
+
+def _shared_instructions() -> bool:
+    return get_settings().instruction_layout != "per_section"
+
+
+def _section_block(section: SectionChunk, shared: bool) -> tuple[str, str]:
+    """Instruction and labelled content of one section in the prompt."""
+    index = _instruction_index(section)
+    instruction = INSTRUCTIONS.delta(index) if shared else INSTRUCTIONS.text(index)
+    return instruction or "", f"{section_label(section)}:\n{section.content or '(раздел пуст)'}\n"
 
 
 def build_sections_instruction(sections: list[SectionChunk]) -> str:
+    """User prompt for ``sections``: the shared instruction once, then each section with its own additions."""
+    shared = _shared_instructions()
     parts: list[str] = []
+    if shared and INSTRUCTIONS.preamble:
+        parts.append(f"Инструкция для каждого раздела:\n{INSTRUCTIONS.preamble}\n")
     for section in sections:
-        is_header = section.number is None
-        instruction_index = 16 if section.is_specification else section.number
-        section_label = (
-            "Шапка"
-            if is_header and not section.is_specification
-            else "Спецификация" if section.is_specification else f"Раздел {section.number}"
-        )
-        instruction_text = _load_instruction_text(instruction_index)
-        if instruction_text:
-            parts.append(instruction_text)
-        parts.append(f"{section_label}:")
-        parts.append(section.content or "(раздел пуст)")
-        parts.append("")
-
+        instruction, block = _section_block(section, shared)
+        if instruction:
+            parts.append(instruction)
+        parts.append(block)
 
     return "\n".join(parts).rstrip()
 
 
+def prompt_composition(sections: list[SectionChunk]) -> dict[str, int]:
+    """Estimated tokens of the section prompt spent on instructions, section text and the specification."""
+    shared = _shared_instructions()
+    composition = {"instructions": 0, "content": 0, "spec": 0}
+    if shared and INSTRUCTIONS.preamble:
+        composition["instructions"] += estimate_tokens(INSTRUCTIONS.preamble)
+    for section in sections:
+        instruction, _ = _section_block(section, shared)
+        composition["instructions"] += estimate_tokens(f"{instruction}\n{section_label(section)}:")
+        composition["spec" if section.is_specification else "content"] += estimate_tokens(section.content)
+    return composition
+
+
+def group_sections(sections: list[SectionChunk], max_tokens: int) -> list[list[SectionChunk]]:
+    """Pack consecutive sections into groups of at most ``max_tokens`` prompt tokens.
+
+    A section larger than the budget forms a group of its own.
+    """
+    shared = _shared_instructions()
+    base_tokens = estimate_tokens(INSTRUCTIONS.preamble) if shared else 0
+    groups: list[list[SectionChunk]] = []
+    current: list[SectionChunk] = []
+    current_tokens = base_tokens
+    for section in sections:
+        tokens = estimate_tokens("\n".join(_section_block(section, shared)))
+        if current and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current, current_tokens = [], base_tokens
+        current.append(section)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
 def render_document_html(sections: Iterable[SectionChunk], specification_text: str | None) -> str:
     blocks: list[str] = []
 
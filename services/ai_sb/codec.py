@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the stdlib encoder is used instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - MessagePack is optional
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - compression is optional
+    zstandard = None
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+ZSTD_ENCODING = "zstd"
+
+_MSGPACK_TYPES = {MSGPACK_CONTENT_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+_IDENTITY_ENCODINGS = {"", "identity", "utf-8", "utf8"}
+
+
+class CodecError(ValueError):
+    """Raised for a message body that cannot be decoded."""
+
+
+def dumps_json(payload: Any) -> bytes:
+    """Compact UTF-8 JSON; orjson when installed, the stdlib encoder otherwise."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson is stricter (e.g. integers above 64 bits); keep the old behaviour.
+            pass
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads_json(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@dataclass(frozen=True, slots=True)
+class EncodedBody:
+    body: bytes
+    content_type: str
+    content_encoding: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class MessageCodec:
+    """Encodes AMQP message bodies and labels them for the consumer.
+
+    ``format`` is ``json`` or ``msgpack``; the chosen format is written to the
+    message ``content_type``. Bodies of ``compress_threshold`` bytes or more
+    are zstd-compressed and marked with ``content_encoding: zstd``; the
+    default 0 keeps compression off, since a consumer without this codec
+    cannot read such a body. Consumers decode by these headers with
+    :func:`decode`, and a message without them is read as plain JSON.
+    """
+
+    format: str = "json"
+    compress_threshold: int = 0
+    compress_level: int = 3
+
+    @classmethod
+    def from_env(cls) -> "MessageCodec":
+        return cls(
+            format=os.getenv("MESSAGE_FORMAT", "json").strip().lower(),
+            compress_threshold=int(os.getenv("MESSAGE_COMPRESS_THRESHOLD", "0")),
+            compress_level=int(os.getenv("MESSAGE_COMPRESS_LEVEL", "3")),
+        )
+
+    def encode(self, payload: Any) -> EncodedBody:
+        body: bytes | None = None
+        content_type = JSON_CONTENT_TYPE
+        if self.format == "msgpack" and msgpack is not None:
+            try:
+                body = msgpack.packb(payload, use_bin_type=True)
+                content_type = MSGPACK_CONTENT_TYPE
+            except (TypeError, ValueError, OverflowError):
+                body = None
+        if body is None:
+            body = dumps_json(payload)
+            content_type = JSON_CONTENT_TYPE
+
+        if zstandard is not None and 0 < self.compress_threshold <= len(body):
+            compressed = zstandard.ZstdCompressor(level=self.compress_level).compress(body)
+            return EncodedBody(compressed, content_type, ZSTD_ENCODING)
+        return EncodedBody(body, content_type)
+
+
+def decode(body: bytes, content_type: str | None = None, content_encoding: str | None = None) -> Any:
+    """Decode a body according to its ``content_type`` and ``content_encoding``."""
+    encoding = (content_encoding or "").strip().lower()
+    if encoding == ZSTD_ENCODING:
+        if zstandard is None:
+            raise CodecError("zstandard is required to read zstd-encoded messages")
+        try:
+            body = zstandard.ZstdDecompressor().decompress(body)
+        except zstandard.ZstdError as exc:
+            raise CodecError(f"Corrupt zstd message body: {exc}") from exc
+    elif encoding not in _IDENTITY_ENCODINGS:
+        raise CodecError(f"Unsupported content encoding: {content_encoding}")
+
+    media_type = (content_type or JSON_CONTENT_TYPE).split(";", 1)[0].strip().lower()
+    if media_type in _MSGPACK_TYPES:
+        if msgpack is None:
+            raise CodecError("msgpack is required to read MessagePack messages")
+        return msgpack.unpackb(body, raw=False, strict_map_key=False)
+    return loads_json(body)
+
+
+def decode_message(message: Any) -> Any:
+    """Decode an incoming AMQP message by its headers."""
+    return decode(message.body, message.content_type, message.content_encoding)
+
+
+__all__ = [
+    "CodecError",
+    "EncodedBody",
+    "JSON_CONTENT_TYPE",
+    "MSGPACK_CONTENT_TYPE",
+    "MessageCodec",
+    "ZSTD_ENCODING",
+    "decode",
+    "decode_message",
+    "dumps_json",
+    "loads_json",
+]
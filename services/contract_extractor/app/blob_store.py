@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, BinaryIO, Callable
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobNotFoundError(FileNotFoundError):
+    """Raised when a referenced blob is missing from the shared store."""
+
+
+class BlobTooLargeError(ValueError):
+    """Raised when a streamed upload exceeds the configured size limit."""
+
+
+@dataclass(frozen=True, slots=True)
+class BlobRef:
+    """Reference to a blob carried in AMQP messages instead of the bytes."""
+
+    digest: str
+    size: int
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"digest": self.digest, "size": self.size}
+
+    @classmethod
+    def from_dict(cls, payload: Any) -> "BlobRef":
+        if not isinstance(payload, dict):
+            raise ValueError("Blob reference must be an object with digest and size")
+        digest = str(payload.get("digest") or "")
+        if not _DIGEST_RE.match(digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return cls(digest=digest, size=int(payload.get("size") or 0))
+
+
+class BlobStore:
+    """Content-addressed blob store on a volume shared between services.
+
+    Blobs live under ``<root>/<aa>/<bb>/<sha256>`` and are written through a
+    temporary file plus rename, so readers never observe partial content and
+    identical payloads are stored once.
+    """
+
+    def __init__(self, root: Path, *, chunk_size: int = 1024 * 1024) -> None:
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+
+    def path_for(self, digest: str) -> Path:
+        if not _DIGEST_RE.match(digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def _commit(self, tmp_path: Path, digest: str) -> Path:
+        target = self.path_for(digest)
+        if target.exists():
+            tmp_path.unlink(missing_ok=True)
+            os.utime(target)
+            return target
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, target)
+        return target
+
+    def _temp_file(self) -> tuple[BinaryIO, Path]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        handle, name = tempfile.mkstemp(prefix=".incoming-", dir=self.root)
+        return os.fdopen(handle, "wb"), Path(name)
+
+    def put_bytes(self, data: bytes) -> BlobRef:
+        """Store an in-memory payload and return its reference."""
+        digest = hashlib.sha256(data).hexdigest()
+        existing = self.path_for(digest)
+        if existing.exists():
+            os.utime(existing)
+            return BlobRef(digest=digest, size=len(data))
+        file, tmp_path = self._temp_file()
+        try:
+            with file:
+                file.write(data)
+            self._commit(tmp_path, digest)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return BlobRef(digest=digest, size=len(data))
+
+    def put_json(self, payload: Any) -> BlobRef:
+        return self.put_bytes(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+    async def put_stream(self, read: Callable[[int], Awaitable[bytes]], *, max_bytes: int) -> BlobRef:
+        """Spool an async byte stream chunk by chunk, hashing it on the way."""
+        digest = hashlib.sha256()
+        size = 0
+        file, tmp_path = await asyncio.to_thread(self._temp_file)
+        try:
+            with file:
+                while chunk := await read(self.chunk_size):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise BlobTooLargeError(f"Upload exceeds {max_bytes} bytes")
+                    digest.update(chunk)
+                    await asyncio.to_thread(file.write, chunk)
+            await asyncio.to_thread(self._commit, tmp_path, digest.hexdigest())
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return BlobRef(digest=digest.hexdigest(), size=size)
+
+    def resolve(self, ref: BlobRef) -> Path:
+        """Return the on-disk path of a referenced blob."""
+        path = self.path_for(ref.digest)
+        if not path.exists():
+            raise BlobNotFoundError(f"Blob {ref.digest} not found in {self.root}")
+        return path
+
+    def open(self, ref: BlobRef) -> BinaryIO:
+        return self.resolve(ref).open("rb")
+
+    def load_json(self, ref: BlobRef) -> Any:
+        """Decode a JSON blob directly from its file."""
+        with self.open(ref) as file:
+            return json.load(file)
+
+    def load_parts(
+        self, payload: dict[str, Any], part_keys: list[str] | None = None, *, inline_key: str = "parts"
+    ) -> dict[str, Any] | None:
+        """Return a message's inline parts or load them by its ``parts_ref``.
+
+        Referenced parts are narrowed to the message's ``part_keys`` when present
+        (older slicers), otherwise to the given ``part_keys``. Raises
+        :class:`BlobNotFoundError` for a pruned blob and ``ValueError`` for a
+        malformed reference.
+        """
+        inline = payload.get(inline_key)
+        if inline is not None:
+            return inline
+
+        parts_ref = payload.get("parts_ref")
+        if not parts_ref:
+            return None
+        parts = self.load_json(BlobRef.from_dict(parts_ref))
+        keys = payload.get("part_keys", part_keys)
+        if keys is None:
+            return parts
+        return {key: value for key, value in parts.items() if key in keys}
+
+    def prune(self, max_age: float) -> int:
+        """Remove blobs (and stale temp files) not written or reused for ``max_age`` seconds."""
+        if not self.root.exists():
+            return 0
+        cutoff = time.time() - max_age
+        removed = 0
+        for path in self.root.rglob("*"):
+            if not path.is_file():
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+__all__ = ["BlobNotFoundError", "BlobRef", "BlobStore", "BlobTooLargeError"]
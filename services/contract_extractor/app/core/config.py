@@ -29,14 +29,46 @@ class Settings(BaseSettings):
         default=None, alias="OLLAMA_NUM_CTX", description="Optional context window override"
     )
     temperature: float = Field(default=0.1, alias="TEMPERATURE")
+    seed: Optional[int] = Field(
+        default=None,
+        alias="SEED",
+        description="Fixed sampling seed; replies are cached only with TEMPERATURE=0 and a seed",
+    )
     max_tokens: int = Field(default=1024, alias="MAX_TOKENS")
     numeric_tolerance: float = Field(default=0.01, alias="NUMERIC_TOLERANCE")
     use_llm: bool = Field(default=True, alias="USE_LLM")
     ollama_read_timeout: float = Field(default=300.0, alias="OLLAMA_READ_TIMEOUT")
+    ollama_connect_timeout: float = Field(default=10.0, alias="OLLAMA_CONNECT_TIMEOUT")
+    ollama_max_connections: int = Field(default=8, alias="OLLAMA_MAX_CONNECTIONS")
+    qa_concurrency: int = Field(
+        default=4,
+        alias="QA_CONCURRENCY",
+        description="QA plan queries sent to Ollama at once; match OLLAMA_NUM_PARALLEL",
+    )
+    qa_plan_merge: str = Field(
+        default="subset",
+        alias="QA_PLAN_MERGE",
+        description="How QA plan queries share prompts: none, parts or subset",
+    )
     supported_languages: List[str] = Field(
         default_factory=lambda: ["ru", "en"], alias="SUPPORTED_LANGUAGES"
     )
 
+    part_keys: List[str] = Field(
+        default_factory=lambda: [
+            "part_4",
+            "part_5",
+            "part_6",
+            "part_7",
+            "part_11",
+            "part_12",
+            "part_15",
+            "part_16",
+        ],
+        alias="CONTRACT_EXTRACTOR_PART_KEYS",
+        description="Parts taken from a sliced document envelope",
+    )
+
     qa_plans_dir: Path = Field(
         default_factory=lambda: Path(__file__).resolve().parent.parent
         / "assets"
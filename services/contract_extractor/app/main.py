@@ -1,12 +1,23 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 
 from ..routes.extraction import router as extraction_router
 from ..handlers.extraction import ensure_qa_service
 from .core.config import get_settings
+from .ollama_pool import close_pools
 
 settings = get_settings()
 
-app = FastAPI(title="Contract Extractor API", version=settings.version)
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    await close_pools()
+
+
+app = FastAPI(title="Contract Extractor API", version=settings.version, lifespan=lifespan)
 
 if settings.use_llm:
     ensure_qa_service()
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import time
 from pathlib import Path
+from dataclasses import dataclass, field
 from typing import Any, Dict, Iterable, List, Optional
 
 from fastapi import HTTPException
 
 from .core.config import Settings
 from .services.ollama_client import OllamaServiceError
-from .services.qa import SectionQuestionAnswering
+from .services.qa import SectionQuestionAnswering, estimate_tokens
 from .services.sb_check_service import SBCheckService
 
 logger = logging.getLogger(__name__)
@@ -74,6 +77,74 @@ class QAPlanLoader:
         return normalized
 
 
+@dataclass(slots=True)
+class QAPromptGroup:
+    """Plan queries answered by one LLM call over the same sections."""
+
+    parts: List[str]
+    indices: List[int]
+    keys: set[str] = field(default_factory=set)
+
+
+class QAPlanCompiler:
+    """Folds QA plan queries into fewer prompts.
+
+    ``merge`` selects which queries share a prompt: ``none`` keeps one prompt
+    per query, ``parts`` merges queries over the same set of parts, and
+    ``subset`` also folds a query into the smallest prompt whose parts include
+    all of its own. Queries with overlapping answer keys are never merged.
+    Prompts are sorted by their part list only to keep the plan report stable;
+    they are all sent at once.
+    """
+
+    MODES = ("none", "parts", "subset")
+
+    def __init__(self, merge: str = "subset") -> None:
+        merge = merge.strip().lower()
+        if merge not in self.MODES:
+            raise ValueError(f"Unknown QA plan merge mode {merge!r}; expected one of {', '.join(self.MODES)}")
+        self.merge = merge
+
+    def compile(self, queries: List[Dict[str, Any]]) -> List[QAPromptGroup]:
+        groups: List[QAPromptGroup] = []
+        # Widest queries first, so every subset can find its host.
+        order = sorted(range(len(queries)), key=lambda index: -len(set(queries[index]["parts"])))
+        for index in order:
+            query = queries[index]
+            host = self._host(groups, set(query["parts"]), set(query["answer"]))
+            if host is None:
+                groups.append(QAPromptGroup(list(query["parts"]), [index], set(query["answer"])))
+            else:
+                host.indices.append(index)
+                host.keys.update(query["answer"])
+
+        for group in groups:
+            group.indices.sort()
+        groups.sort(key=lambda group: tuple(group.parts))
+        return groups
+
+    def _host(self, groups: List[QAPromptGroup], parts: set[str], keys: set[str]) -> Optional[QAPromptGroup]:
+        if self.merge == "none":
+            return None
+        candidates = [
+            group
+            for group in groups
+            if not keys & group.keys
+            and (parts == set(group.parts) if self.merge == "parts" else parts <= set(group.parts))
+        ]
+        return min(candidates, key=lambda group: len(group.parts), default=None)
+
+    @staticmethod
+    def question(queries: List[Dict[str, Any]]) -> str:
+        """Question text of a prompt; merged questions name the keys they fill."""
+        if len(queries) == 1:
+            return queries[0]["question"]
+        return "\n\n".join(
+            f"{number}. {query['question']} (ключи JSON: {', '.join(query['answer'])})"
+            for number, query in enumerate(queries, start=1)
+        )
+
+
 class QAPlanPipeline:
     """Pipeline that executes QA plans against provided contract sections."""
 
@@ -83,11 +154,16 @@ class QAPlanPipeline:
         plan_loader: QAPlanLoader,
         qa_service: Optional[SectionQuestionAnswering],
         sb_service: Optional[SBCheckService] = None,
+        compiler: Optional[QAPlanCompiler] = None,
     ) -> None:
         self.settings = settings
         self.plan_loader = plan_loader
         self.qa_service = qa_service
         self.sb_service = sb_service
+        self.compiler = compiler or QAPlanCompiler(settings.qa_plan_merge)
+        # One limit for the whole process: concurrent documents share the
+        # qa_concurrency slots instead of each opening its own.
+        self.semaphore = asyncio.Semaphore(max(1, settings.qa_concurrency))
 
     async def run(self, sections: Dict[str, Any] | List[Any], plan: str) -> Dict[str, Any]:
         """Execute the requested QA plan and attach optional SB-check results."""
@@ -119,30 +195,176 @@ class QAPlanPipeline:
     async def _run_queries(
         self, sections_map: Dict[str, str], queries: Iterable[Dict[str, Any]]
     ) -> Dict[str, Any]:
-        """Ask the LLM questions for each plan entry and aggregate answers."""
+        """Ask the LLM questions for each plan entry and aggregate answers.
+
+        Queries are folded into prompts by :class:`QAPlanCompiler`, and up to
+        ``qa_concurrency`` prompts run at once across all documents. Answers are merged in plan
+        order, so the result does not depend on which prompt finishes first. A
+        failed query keeps empty placeholders and its error; the plan fails
+        only when every query did.
+        """
         qa_service = self.qa_service
         if qa_service is None:
             raise HTTPException(status_code=503, detail="LLM features are disabled")
 
+        queries = list(queries)
+        missing_parts = {name for query in queries for name in query["parts"] if name not in sections_map}
+        if missing_parts:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Sections not found for parts: {', '.join(sorted(missing_parts))}",
+            )
+
+        started = time.perf_counter()
+        groups = self.compiler.compile(queries)
+        answered = await asyncio.gather(
+            *(self._run_group(qa_service, self.semaphore, sections_map, queries, group) for group in groups)
+        )
+
+        by_index = {index: response for group_responses in answered for index, response in group_responses}
+        responses = [by_index[index] for index in range(len(queries))]
         aggregated: Dict[str, Any] = {}
-        responses: List[Dict[str, Any]] = []
+        errors: List[str] = []
+        for response in responses:
+            aggregated.update(response["result"])
+            if "error" in response:
+                errors.append(response["error"])
+
+        report = self._plan_report(qa_service, sections_map, queries, groups, responses)
+        payload: Dict[str, Any] = {
+            "ok": len(errors) < len(responses),
+            "result": aggregated,
+            "responses": responses,
+            "elapsed": round(time.perf_counter() - started, 3),
+            "plan": report,
+        }
+        if errors:
+            payload["error"] = errors[0]
+        logger.info(
+            "QA plan: %d queries in %d calls (%d fallbacks) in %.2fs, %d failed, ~%d prompt tokens saved",
+            len(responses),
+            report["calls"],
+            report["fallbacks"],
+            payload["elapsed"],
+            len(errors),
+            report["prompt_tokens_saved_estimate"],
+        )
+        return payload
 
-        for query in queries:
-            missing_parts = [name for name in query["parts"] if name not in sections_map]
-            if missing_parts:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Sections not found for parts: {', '.join(sorted(set(missing_parts)))}",
+    async def _run_group(
+        self,
+        qa_service: SectionQuestionAnswering,
+        semaphore: asyncio.Semaphore,
+        sections_map: Dict[str, str],
+        queries: List[Dict[str, Any]],
+        group: QAPromptGroup,
+    ) -> List[tuple[int, Dict[str, Any]]]:
+        """Answer the queries of one prompt group, re-asking alone any query left unanswered."""
+        members = [queries[index] for index in group.indices]
+        if len(members) == 1:
+            response, _ = await self._run_query(qa_service, semaphore, sections_map, members[0])
+            return [(group.indices[0], response)]
+
+        merged_query = {
+            "parts": group.parts,
+            "question": self.compiler.question(members),
+            "answer": [key for query in members for key in query["answer"]],
+        }
+        merged, missing = await self._run_query(qa_service, semaphore, sections_map, merged_query)
+
+        results: List[tuple[int, Dict[str, Any]]] = []
+        for index, query in zip(group.indices, members):
+            if "error" not in merged and all(key in missing for key in query["answer"]):
+                # The combined answer had nothing for this query, e.g. it was not valid JSON.
+                response, _ = await self._run_query(qa_service, semaphore, sections_map, query)
+                response["fallback"] = True
+            else:
+                response = {key: value for key, value in merged.items() if key not in {"question", "parts", "result"}}
+                response.update(
+                    question=query["question"],
+                    parts=query["parts"],
+                    result={key: merged["result"][key] for key in query["answer"]},
+                    prompt_parts=group.parts,
                 )
+            results.append((index, response))
+        return results
 
-            combined_text = "\n\n".join(sections_map[name] for name in query["parts"])
-            result = await qa_service.ask(combined_text, query["question"], query["answer"])
+    @staticmethod
+    async def _run_query(
+        qa_service: SectionQuestionAnswering,
+        semaphore: asyncio.Semaphore,
+        sections_map: Dict[str, str],
+        query: Dict[str, Any],
+    ) -> tuple[Dict[str, Any], List[str]]:
+        """Ask one prompt, recording its queueing and LLM time and any error.
+
+        Returns the response and the answer keys the model left out.
+        """
+        combined_text = "\n\n".join(sections_map[name] for name in query["parts"])
+        response: Dict[str, Any] = {"question": query["question"], "parts": query["parts"]}
+        missing: List[str] = []
+
+        queued_at = time.perf_counter()
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                exchange = await qa_service.ask_detailed(combined_text, query["question"], query["answer"])
+            except OllamaServiceError as exc:
+                logger.warning("QA query over %s failed: %s", query["parts"], exc)
+                response["result"] = {key: "" for key in query["answer"]}
+                response["error"] = str(exc)
+            except Exception:  # pragma: no cover - defensive guard
+                logger.exception("Unhandled error in QA query over %s", query["parts"])
+                response["result"] = {key: "" for key in query["answer"]}
+                response["error"] = "Internal processing error"
+            else:
+                response["result"] = exchange.result
+                response["prompt_tokens"] = exchange.reply.timings.prompt_eval_count
+                response["cached"] = exchange.reply.cached
+                missing = exchange.missing
+            finished = time.perf_counter()
+
+        response["queued"] = round(started - queued_at, 3)
+        response["elapsed"] = round(finished - started, 3)
+        return response, missing
+
+    def _plan_report(
+        self,
+        qa_service: SectionQuestionAnswering,
+        sections_map: Dict[str, str],
+        queries: List[Dict[str, Any]],
+        groups: List[QAPromptGroup],
+        responses: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Estimate the prompt tokens the compiled plan sends compared to one prompt per query."""
 
-            responses.append({"question": query["question"], "parts": query["parts"], "result": result})
-            for key, value in result.items():
-                aggregated[key] = value
+        def prompt_tokens(parts: List[str], question: str, keys: List[str]) -> int:
+            text = "\n\n".join(sections_map[name] for name in parts)
+            return estimate_tokens(qa_service.system_prompt) + estimate_tokens(
+                qa_service.build_prompt(text, question, keys)
+            )
 
-        return {"ok": True, "result": aggregated, "responses": responses}
+        separate = sum(prompt_tokens(q["parts"], q["question"], q["answer"]) for q in queries)
+        compiled = 0
+        for group in groups:
+            members = [queries[index] for index in group.indices]
+            compiled += prompt_tokens(
+                group.parts,
+                self.compiler.question(members),
+                [key for query in members for key in query["answer"]],
+            )
+        fallbacks = [response for response in responses if response.get("fallback")]
+        compiled += sum(
+            prompt_tokens(r["parts"], r["question"], list(r["result"])) for r in fallbacks
+        )
+        return {
+            "merge": self.compiler.merge,
+            "queries": len(queries),
+            "calls": len(groups) + len(fallbacks),
+            "fallbacks": len(fallbacks),
+            "prompt_tokens_estimate": compiled,
+            "prompt_tokens_saved_estimate": separate - compiled,
+        }
 
     @staticmethod
     def _collect_plan_parts(queries: Iterable[Dict[str, Any]]) -> set[str]:
@@ -234,4 +456,4 @@ class QAPlanPipeline:
         return payload
 
 
-__all__ = ["QAPlanLoader", "QAPlanPipeline"]
+__all__ = ["QAPlanCompiler", "QAPlanLoader", "QAPlanPipeline", "QAPromptGroup"]
@@ -4,13 +4,35 @@ from __future__ import annotations
 
 import json
 from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List
 
 from ..core.config import Settings, get_settings
+from ..ollama_pool import OllamaReply
 from .normalize import normalize_whitespace
 from .ollama_client import OllamaClient
 
+# Rough characters per token of the Qwen tokenizer on mixed Russian text.
+_CHARS_PER_TOKEN = 3.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate prompt size in tokens, for comparing prompt layouts."""
+    return int(len(text) / _CHARS_PER_TOKEN) + 1
+
+
+@dataclass(slots=True)
+class QAExchange:
+    """One question asked by :meth:`SectionQuestionAnswering.ask_detailed`."""
+
+    result: Dict[str, str]
+    prompt: str
+    raw: str
+    reply: OllamaReply
+    # Answer keys the model did not return as strings.
+    missing: List[str]
+
 
 class SectionQuestionAnswering:
     """Lightweight helper that asks the LLM about selected document sections.
@@ -18,7 +40,8 @@ class SectionQuestionAnswering:
     The class builds a compact prompt that contains only the requested parts of
     the document, a natural language question, and a JSON skeleton with the
     expected answer keys. The LLM response is parsed back into a dictionary with
-    those keys.
+    those keys. The instance holds no per-call state, so questions may be
+    asked concurrently.
     """
 
     def __init__(
@@ -31,38 +54,56 @@ class SectionQuestionAnswering:
         self.system_prompt = Path(system_prompt_path).read_text(encoding="utf-8")
         self.user_template = Path(user_template_path).read_text(encoding="utf-8")
         self.client = OllamaClient(self.settings)
-        self.last_prompt: str = ""
-        self.last_raw: str = ""
 
     async def ask(
         self, sections_text: str, question: str, answer_keys: List[str]
     ) -> Dict[str, str]:
-        skeleton = OrderedDict((key, "") for key in answer_keys)
-        json_skeleton = json.dumps(skeleton, ensure_ascii=False, indent=2)
-
-        user_prompt = self.user_template.format(
-            sections_text=sections_text[:100000],
-            question=question.strip(),
-            json_skeleton=json_skeleton,
-        )
-        self.last_prompt = normalize_whitespace(user_prompt)
+        exchange = await self.ask_detailed(sections_text, question, answer_keys)
+        return exchange.result
 
-        raw = await self.client.chat(
+    async def ask_detailed(
+        self, sections_text: str, question: str, answer_keys: List[str]
+    ) -> QAExchange:
+        """Like :meth:`ask`, also returning the prompt, the raw answer and its timings."""
+        user_prompt = self.build_prompt(sections_text, question, answer_keys)
+        reply = await self.client.complete(
             self.system_prompt,
             user_prompt,
             temperature=self.settings.temperature,
             max_tokens=self.settings.max_tokens,
+            # An answer without a JSON object is not worth serving again.
+            cache_if=lambda content: bool(self._parse_json(content)),
         )
-        self.last_raw = raw
+        raw = reply.content
 
         data = self._parse_json(raw)
 
         merged = {key: "" for key in answer_keys}
+        missing: List[str] = []
         for key in answer_keys:
             if key in data and isinstance(data[key], str):
                 merged[key] = data[key]
+            else:
+                missing.append(key)
+
+        return QAExchange(
+            result=merged,
+            prompt=normalize_whitespace(user_prompt),
+            raw=raw,
+            reply=reply,
+            missing=missing,
+        )
 
-        return merged
+    def build_prompt(self, sections_text: str, question: str, answer_keys: List[str]) -> str:
+        """Render the user prompt; the sections come first so prompts over the same parts share a prefix."""
+        skeleton = OrderedDict((key, "") for key in answer_keys)
+        json_skeleton = json.dumps(skeleton, ensure_ascii=False, indent=2)
+
+        return self.user_template.format(
+            sections_text=sections_text[:100000],
+            question=question.strip(),
+            json_skeleton=json_skeleton,
+        )
 
     def _parse_json(self, raw: str) -> Dict[str, str]:
         try:
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import asyncio
+import importlib.util
+import json
+import time
 from dataclasses import dataclass
-from pathlib import Path
 from typing import Any, Dict, Optional
 
 import httpx
 
 from .config import Settings
+from .endpoint_health import EndpointRegistry
 
 
 @dataclass
@@ -26,12 +30,38 @@ class ServiceResult:
         return {"error": self.error, "status": self.status}
 
 
+def create_http_client(settings: Settings) -> httpx.AsyncClient:
+    """Process-wide pooled client: keep-alive connections, HTTP/2 when ``h2`` is installed."""
+    return httpx.AsyncClient(
+        http2=settings.http2 and importlib.util.find_spec("h2") is not None,
+        timeout=httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout),
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive,
+        ),
+        trust_env=False,
+    )
+
+
+def encode_sections(parts: Dict[str, str]) -> bytes:
+    """Serialize parts once per dispatch; every upload reuses the same bytes."""
+    return json.dumps(parts, ensure_ascii=False).encode("utf-8")
+
+
 class BaseServiceClient:
     """Base class for thin HTTP clients with shared parsing helpers."""
-    def __init__(self, settings: Settings, name: str, url: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        settings: Settings,
+        name: str,
+        url: Optional[str] = None,
+        *,
+        endpoints: EndpointRegistry,
+    ) -> None:
         self.settings = settings
         self.name = name
         self.url = url
+        self.endpoints = endpoints
 
     @staticmethod
     def _parse_response_payload(response: httpx.Response) -> Any:
@@ -41,158 +71,119 @@ class BaseServiceClient:
         except Exception:
             return response.text
 
+    def _error(self, url: Optional[str], error: str, status: Optional[int] = None) -> ServiceResult:
+        return ServiceResult(service=self.name, url=url, status=status, response=None, error=error)
 
-class AiEconomClient(BaseServiceClient):
-    """Uploads parsed sections to the ai_econom service for budget analysis."""
-    def __init__(self, settings: Settings) -> None:
-        super().__init__(settings=settings, name="ai_econom", url=settings.ai_econom_url)
-
-    async def analyze(self, client: httpx.AsyncClient, sections_path: Path) -> ServiceResult:
-        """Send the sections.json file to ai_econom and return a normalized result."""
-        if not sections_path.exists():
-            return ServiceResult(
-                service=self.name,
-                url=self.url,
-                status=None,
-                response=None,
-                error=f"Sections file not found at {sections_path}",
-            )
-
-        files = {
-            "spec_file": (
-                sections_path.name,
-                sections_path.open("rb"),
-                "application/json",
-            ),
-        }
+    async def _post(self, client: httpx.AsyncClient, url: str, **kwargs: Any) -> ServiceResult:
+        """POST through the endpoint's circuit breaker and record the outcome."""
+        endpoint = self.endpoints.get(url)
+        if not endpoint.allow():
+            return self._error(url, f"Circuit open for {url}: {endpoint.last_error}")
 
+        started = time.perf_counter()
         try:
-            response = await client.post(self.url, files=files)
-            status = response.status_code
-            payload = (
-                self._parse_response_payload(response)
-                if status == 200
-                else None
-            )
-            error = None if status == 200 else response.text
-            return ServiceResult(
-                service=self.name,
-                url=self.url,
-                status=status,
-                response=payload,
-                error=error,
-            )
+            response = await client.post(url, **kwargs)
+        except asyncio.CancelledError:
+            endpoint.release()
+            raise
+        except (httpx.ConnectError, httpx.ConnectTimeout) as exc:
+            self.endpoints.trip_origin(url, str(exc) or type(exc).__name__)
+            return self._error(url, str(exc) or type(exc).__name__)
         except Exception as exc:  # pragma: no cover - external dependency
-            return ServiceResult(
-                service=self.name,
-                url=self.url,
-                status=None,
-                response=None,
-                error=str(exc),
-            )
-        finally:
-            try:
-                files["spec_file"][1].close()
-            except Exception:
-                pass
+            endpoint.record_failure(str(exc) or type(exc).__name__)
+            return self._error(url, str(exc) or type(exc).__name__)
+
+        status = response.status_code
+        if status != 200:
+            endpoint.record_failure(f"HTTP {status}")
+            return self._error(url, response.text, status)
+
+        endpoint.record_success(time.perf_counter() - started)
+        return ServiceResult(
+            service=self.name,
+            url=url,
+            status=status,
+            response=self._parse_response_payload(response),
+            error=None,
+        )
+
+
+class AiEconomClient(BaseServiceClient):
+    """Uploads parsed sections to the ai_econom service for budget analysis."""
+    def __init__(self, settings: Settings, *, endpoints: EndpointRegistry) -> None:
+        super().__init__(settings=settings, name="ai_econom", url=settings.ai_econom_url, endpoints=endpoints)
+
+    async def analyze(self, client: httpx.AsyncClient, sections: bytes) -> ServiceResult:
+        """Send the serialized sections to ai_econom as ``sections.json`` and return a normalized result."""
+        files = {"spec_file": ("sections.json", sections, "application/json")}
+        return await self._post(client, self.url, files=files)
 
 
 class AiLegalClient(BaseServiceClient):
     """Uploads parsed sections to the ai_legal service for legal review."""
-    def __init__(self, settings: Settings) -> None:
-        super().__init__(settings=settings, name="ai_legal", url=settings.ai_legal_url)
-
-    async def analyze(self, client: httpx.AsyncClient, sections_path: Path) -> ServiceResult:
-        """Send the sections.json file to ai_legal and return a normalized result."""
-        if not sections_path.exists():
-            return ServiceResult(
-                service=self.name,
-                url=self.url,
-                status=None,
-                response=None,
-                error=f"Sections file not found at {sections_path}",
-            )
-
-        files = {
-            "file": (
-                sections_path.name,
-                sections_path.open("rb"),
-                "application/json",
-            ),
-        }
+    def __init__(self, settings: Settings, *, endpoints: EndpointRegistry) -> None:
+        super().__init__(settings=settings, name="ai_legal", url=settings.ai_legal_url, endpoints=endpoints)
 
-        try:
-            response = await client.post(self.url, files=files)
-            status = response.status_code
-            payload = (
-                self._parse_response_payload(response)
-                if status == 200
-                else None
-            )
-            error = None if status == 200 else response.text
-            return ServiceResult(
-                service=self.name,
-                url=self.url,
-                status=status,
-                response=payload,
-                error=error,
-            )
-        except Exception as exc:  # pragma: no cover - external dependency
-            return ServiceResult(
-                service=self.name,
-                url=self.url,
-                status=None,
-                response=None,
-                error=str(exc),
-            )
-        finally:
-            try:
-                files["file"][1].close()
-            except Exception:
-                pass
+    async def analyze(self, client: httpx.AsyncClient, sections: bytes) -> ServiceResult:
+        """Send the serialized sections to ai_legal as ``sections.json`` and return a normalized result."""
+        files = {"file": ("sections.json", sections, "application/json")}
+        return await self._post(client, self.url, files=files)
 
 
 class ContractExtractorClient(BaseServiceClient):
-    """Tries multiple contract_extractor endpoints until one succeeds."""
-    def __init__(self, settings: Settings) -> None:
-        super().__init__(
-            settings=settings,
-            name="contract_extractor",
-            url=None,
-        )
+    """Tries contract_extractor endpoints, healthiest first, until one succeeds.
+
+    URLs whose circuit is open are skipped. With ``hedge_delay`` set, the next
+    candidate is also started when the current one has not answered within
+    that many seconds, and the first successful response wins.
+    """
+    def __init__(self, settings: Settings, *, endpoints: EndpointRegistry) -> None:
+        super().__init__(settings=settings, name="contract_extractor", url=None, endpoints=endpoints)
+        self.hedge_delay = settings.contract_extractor_hedge_delay
 
     async def extract(self, client: httpx.AsyncClient, payload: Dict[str, Any]) -> ServiceResult:
         """Call contract_extractor with the provided sections payload, rotating URLs on failure."""
+        candidates = iter(self.endpoints.candidates(self.settings.contract_extractor_urls))
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {"accept": "application/json", "content-type": "application/json"}
         errors: list[str] = []
-        for url in self.settings.contract_extractor_urls:
-            try:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    headers={"accept": "application/json", "content-type": "application/json"},
+        pending: set[asyncio.Task[ServiceResult]] = set()
+
+        def launch() -> None:
+            url = next(candidates, None)
+            if url is not None:
+                pending.add(asyncio.create_task(self._post(client, url, content=body, headers=headers)))
+
+        try:
+            launch()
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay or None,
+                    return_when=asyncio.FIRST_COMPLETED,
                 )
-                status = response.status_code
-                if status == 200:
-                    return ServiceResult(
-                        service=self.name,
-                        url=url,
-                        status=status,
-                        response=self._parse_response_payload(response),
-                        error=None,
-                    )
-
-                errors.append(f"{url}: {status} {response.text}")
-            except Exception as exc:  # pragma: no cover - external dependency
-                errors.append(f"{url}: {exc}")
-
-        error_message = None
-        if errors:
-            error_message = f"All connection attempts failed ({'; '.join(errors)})"
+                if not done:
+                    # Slow answer: hedge with the next endpoint, keep waiting on both.
+                    launch()
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    result = task.result()
+                    if result.status == 200:
+                        return result
+                    if result.status is not None:
+                        errors.append(f"{result.url}: {result.status} {result.error}")
+                    else:
+                        errors.append(f"{result.url}: {result.error}")
+                if not pending:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if not errors:
+            return self._error(None, "All contract_extractor endpoints have open circuits")
+        return self._error(None, f"All connection attempts failed ({'; '.join(errors)})")
 
-        return ServiceResult(
-            service=self.name,
-            url=None,
-            status=None,
-            response=None,
-            error=error_message,
-        )
@@ -3,8 +3,9 @@ from __future__ import annotations
 
 from io import BytesIO
 from pathlib import Path
-from typing import Callable, Iterable
+from typing import Callable, Iterable, Iterator
 import html
+import os
 import re
 
 from docx import Document
@@ -14,9 +15,16 @@ from docx.oxml.text.paragraph import CT_P
 from docx.table import Table
 from docx.text.paragraph import Paragraph
 
+from .docx_stream import iter_docx_blocks
 from .models import Block
 
-Parser = Callable[[bytes], list[Block]]
+# Raw bytes from an HTTP upload or a path to a blob on the shared volume.
+DocumentSource = bytes | Path
+Parser = Callable[[DocumentSource], list[Block]]
+
+# "stream" parses word/document.xml with lxml iterparse; "python-docx" keeps the
+# original object-model reader (slower and quadratic on merged table cells).
+DOCX_READER = os.getenv("SLICER_DOCX_READER", "stream")
 
 
 def _append_line(lines: list[str], mapping: list[tuple[int, int]], block_index: int, value: str, *, row_index: int = -1) -> None:
@@ -55,8 +63,9 @@ def _table_to_rows(table: Table) -> list[list[str]]:
     return rows
 
 
-def _parse_docx(payload: bytes) -> list[Block]:
-    document = Document(BytesIO(payload))
+def _parse_docx_python_docx(payload: DocumentSource) -> list[Block]:
+    # python-docx reads a path lazily through zipfile, so blobs are not copied into memory.
+    document = Document(str(payload) if isinstance(payload, Path) else BytesIO(payload))
     blocks: list[Block] = []
     for item in _iter_docx_blocks(document):
         if isinstance(item, Paragraph):
@@ -70,8 +79,19 @@ def _parse_docx(payload: bytes) -> list[Block]:
     return blocks
 
 
-def _parse_plain_text(payload: bytes) -> list[Block]:
-    text = payload.decode("utf-8", "ignore")
+def _parse_docx_stream(payload: DocumentSource) -> list[Block]:
+    return list(iter_docx_blocks(payload, _clean_text_noise))
+
+
+def _parse_docx(payload: DocumentSource) -> list[Block]:
+    if DOCX_READER == "python-docx":
+        return _parse_docx_python_docx(payload)
+    return _parse_docx_stream(payload)
+
+
+def _parse_plain_text(payload: DocumentSource) -> list[Block]:
+    raw = payload.read_bytes() if isinstance(payload, Path) else payload
+    text = raw.decode("utf-8", "ignore")
     lines = [line.rstrip() for line in text.splitlines()]
     blocks: list[Block] = []
     current_table: list[list[str]] = []
@@ -99,7 +119,7 @@ def _parse_plain_text(payload: bytes) -> list[Block]:
     return blocks
 
 
-def load_blocks(filename: str, payload: bytes) -> list[Block]:
+def load_blocks(filename: str, payload: DocumentSource) -> list[Block]:
     suffix = Path(filename or "").suffix.lower()
     parsers: dict[str, Parser] = {
         ".docx": _parse_docx,
@@ -110,6 +130,13 @@ def load_blocks(filename: str, payload: bytes) -> list[Block]:
     return parser(payload)
 
 
+def iter_blocks(filename: str, payload: DocumentSource) -> Iterator[Block]:
+    """Like :func:`load_blocks`, but streams DOCX blocks instead of building the list."""
+    if Path(filename or "").suffix.lower() == ".docx" and DOCX_READER != "python-docx":
+        return iter_docx_blocks(payload, _clean_text_noise)
+    return iter(load_blocks(filename, payload))
+
+
 def blocks_to_html(blocks: list[Block]) -> str:
     parts: list[str] = []
     for block in blocks:
@@ -125,22 +152,37 @@ def blocks_to_html(blocks: list[Block]) -> str:
     return "".join(parts)
 
 
+def iter_block_lines(block: Block) -> Iterator[tuple[str, int]]:
+    """Prompt lines of one block with their row index (-1 for paragraphs)."""
+    if block.type == "paragraph":
+        text = (block.text or "").strip()
+        if text:
+            yield text, -1
+        return
+
+    for row_index, row in enumerate(block.rows or []):
+        row_text = " | ".join(cell.strip() for cell in row if cell and cell.strip())
+        if row_text:
+            yield f"TABLE: {row_text}", row_index
+
+
 def blocks_to_prompt_lines_with_mapping(blocks: list[Block]) -> tuple[list[str], list[tuple[int, int]]]:
     lines: list[str] = []
     mapping: list[tuple[int, int]] = []
 
     for block_index, block in enumerate(blocks):
-        if block.type == "paragraph":
-            text = (block.text or "").strip()
-            _append_line(lines, mapping, block_index, text)
-            continue
-
-        for row_index, row in enumerate(block.rows or []):
-            row_text = " | ".join(cell.strip() for cell in row if cell and cell.strip())
-            if row_text:
-                _append_line(lines, mapping, block_index, f"TABLE: {row_text}", row_index=row_index)
+        for line, row_index in iter_block_lines(block):
+            _append_line(lines, mapping, block_index, line, row_index=row_index)
 
     return lines, mapping
 
 
-__all__ = ["Block", "blocks_to_html", "blocks_to_prompt_lines_with_mapping", "load_blocks"]
\ No newline at end of file
+__all__ = [
+    "Block",
+    "DocumentSource",
+    "blocks_to_html",
+    "blocks_to_prompt_lines_with_mapping",
+    "iter_block_lines",
+    "iter_blocks",
+    "load_blocks",
+]
\ No newline at end of file
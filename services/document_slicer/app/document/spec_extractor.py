@@ -6,7 +6,7 @@ from pathlib import Path
 from typing import Literal
 
 from .models import Block
-from .reader import load_blocks
+from .reader import DocumentSource, load_blocks
 from .utils import is_specification_table
 
 BlockType = Literal["paragraph", "table"]
@@ -34,7 +34,7 @@ class UnsupportedDocumentError(RuntimeError):
     """Raised when a document cannot be parsed."""
 
 
-def extract_specification(filename: str, content: bytes) -> SpecificationResult:
+def extract_specification(filename: str, content: DocumentSource) -> SpecificationResult:
     suffix = Path(filename or "").suffix.lower()
     if suffix not in {".docx", ".txt", ".md"}:
         raise UnsupportedDocumentError("Поддерживаются только файлы DOCX и TXT")
@@ -51,37 +51,113 @@ def extract_specification_from_blocks(blocks: list[Block]) -> SpecificationResul
 
 
 def _locate_specification(blocks: list[Block]) -> SpecificationResult | None:
-    best_result: tuple[tuple[int, int], SpecificationResult] | None = None
-
+    locator = SpecificationLocator()
     for idx, block in enumerate(blocks):
-        if not _is_heading_candidate(block):
-            continue
-        collected = _collect_tables_after_heading(blocks, idx)
-        if collected is None:
-            continue
-
-        tables, end_index = collected
-        if not tables:
-            continue
-        heading_text = (block.text or "").strip() or "Спецификация"
-        priority = _heading_priority(heading_text)
-        key = (priority, idx)
-
-        result = SpecificationResult(
-            heading=heading_text,
-            start_index=idx,
-            end_index=end_index,
-            tables=tables,
-            start_block=block,
-            end_block=blocks[end_index],
+        locator.feed(idx, block)
+    return locator.result()
+
+
+class _RegionCollector:
+    """Collects the specification tables that follow a heading, block by block."""
+
+    _END_PATTERNS = ("общая цена", "общая сумма")
+
+    def __init__(self, index: int, heading: Block) -> None:
+        self.index = index
+        self.heading = heading
+        self.tables: list[TableRegion] = []
+        self.done = False
+        self._last_index = index
+        self._last_block = heading
+
+    def _mark(self, cursor: int, block: Block) -> None:
+        self._last_index = cursor
+        self._last_block = block
+
+    def feed(self, cursor: int, block: Block, is_spec: bool) -> None:
+        if self.done:
+            return
+        found_tables = bool(self.tables)
+
+        if block.type == "paragraph":
+            text = (block.text or "").strip()
+            if not text or not found_tables:
+                return
+            if any(pattern in text.casefold() for pattern in self._END_PATTERNS):
+                self._mark(cursor, block)
+                self.done = True
+            elif _looks_like_heading(text):
+                self.done = True
+            else:
+                self._mark(cursor, block)
+            return
+
+        if block.type != "table" or not block.rows:
+            return
+
+        if not is_spec:
+            self.done = self.done or found_tables
+            return
+
+        self.tables.append(TableRegion(index=cursor, start_index=cursor, end_index=cursor, block=block))
+        self._mark(cursor, block)
+
+    def result(self) -> SpecificationResult | None:
+        if not self.tables:
+            return None
+        if self._last_index < self.tables[-1].end_index:
+            self._mark(self.tables[-1].end_index, self.tables[-1].block)
+        return SpecificationResult(
+            heading=_heading_text(self.heading),
+            start_index=self.index,
+            end_index=self._last_index,
+            tables=self.tables,
+            start_block=self.heading,
+            end_block=self._last_block,
         )
 
-        if best_result is None or key < best_result[0]:
-            best_result = (key, result)
 
-    if best_result is None:
-        return None
-    return best_result[1]
+class SpecificationLocator:
+    """Finds the best heading/table region while the blocks stream past once.
+
+    The region found after a heading depends only on the first specification
+    table that follows it, so the winner is the heading with the lowest
+    ``(priority, index)`` that is followed by any specification table. Each
+    table is classified once, and only the region of the current best heading
+    is collected, so blocks do not have to be kept in memory.
+    """
+
+    def __init__(self) -> None:
+        self._best_key: tuple[int, int] | None = None
+        self._pending: tuple[tuple[int, int], Block] | None = None
+        self._region: _RegionCollector | None = None
+
+    def feed(self, idx: int, block: Block) -> None:
+        is_spec = block.type == "table" and bool(block.rows) and is_specification_table(block)
+        if is_spec and self._pending is not None:
+            # Every heading seen since the previous specification table is
+            # followed by this one; switch regions if the best of them wins.
+            key, heading = self._pending
+            if self._best_key is None or key < self._best_key:
+                self._best_key = key
+                self._region = _RegionCollector(key[1], heading)
+            self._pending = None
+
+        if self._region is not None:
+            self._region.feed(idx, block, is_spec)
+
+        if is_spec or not _is_heading_candidate(block):
+            return
+        key = (_heading_priority(_heading_text(block)), idx)
+        if self._pending is None or key < self._pending[0]:
+            self._pending = (key, block)
+
+    def result(self) -> SpecificationResult | None:
+        return self._region.result() if self._region is not None else None
+
+
+def _heading_text(block: Block) -> str:
+    return (block.text or "").strip() or "Спецификация"
 
 
 def _heading_priority(text: str) -> int:
@@ -116,59 +192,6 @@ def _is_heading_candidate(block: Block) -> bool:
     return any(pattern in text for pattern in spec_patterns)
 
 
-def _collect_tables_after_heading(blocks: list[Block], index: int) -> tuple[list[TableRegion], int] | None:
-    end_patterns = ["общая цена", "общая сумма"]
-
-    tables: list[TableRegion] = []
-    last_relevant_index = index
-    found_tables = False
-
-    for cursor in range(index + 1, len(blocks)):
-        block = blocks[cursor]
-
-        if block.type == "paragraph":
-            text = (block.text or "").strip()
-            normalized = text.casefold()
-
-            if not text:
-                continue
-
-            if found_tables and any(pattern in normalized for pattern in end_patterns):
-                last_relevant_index = cursor
-                break
-
-            if found_tables and _looks_like_heading(text):
-                break
-
-            if not found_tables:
-                continue
-
-            last_relevant_index = cursor
-            continue
-
-        if block.type != "table":
-            continue
-        rows = block.rows or []
-        if not rows:
-            continue
-
-        if not is_specification_table(block):
-            if found_tables:
-                break
-            continue
-
-        tables.append(TableRegion(index=cursor, start_index=cursor, end_index=cursor, block=block))
-        last_relevant_index = cursor
-        found_tables = True
-
-    if not tables:
-        return None
-    if last_relevant_index < tables[-1].end_index:
-        last_relevant_index = tables[-1].end_index
-
-    return tables, last_relevant_index
-
-
 def _looks_like_heading(text: str) -> bool:
     normalized = text.strip()
     if not normalized:
@@ -187,6 +210,7 @@ def _looks_like_heading(text: str) -> bool:
 
 
 __all__ = [
+    "SpecificationLocator",
     "SpecificationResult",
     "TableRegion",
     "UnsupportedDocumentError",
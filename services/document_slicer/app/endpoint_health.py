@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+from urllib.parse import urlsplit
+
+
+@dataclass
+class EndpointHealth:
+    """Cached health of one downstream URL with a simple circuit breaker.
+
+    ``failure_threshold`` consecutive failures open the circuit for
+    ``reset_after`` seconds; a refused or timed-out connection opens it at
+    once. After the cooldown one probe is let through (half-open): success
+    closes the circuit, failure opens it for another cooldown.
+    """
+
+    url: str
+    failure_threshold: int
+    reset_after: float
+    consecutive_failures: int = 0
+    opened_at: float | None = None
+    probing: bool = False
+    last_success: float | None = None
+    last_failure: float | None = None
+    last_latency: float | None = None
+    last_error: str | None = None
+    successes: int = 0
+    failures: int = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; claims the half-open probe slot."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self, latency: float) -> None:
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.last_success = time.time()
+        self.last_latency = latency
+        self.last_error = None
+
+    def record_failure(self, error: str, *, trip: bool = False) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_failure = time.time()
+        self.last_error = error
+        if trip or self.probing or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+    def release(self) -> None:
+        """Give back a probe slot taken by a request that was cancelled."""
+        self.probing = False
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "last_success": self.last_success,
+            "last_failure": self.last_failure,
+            "last_latency": self.last_latency,
+            "last_error": self.last_error,
+        }
+
+
+@dataclass
+class EndpointRegistry:
+    """Process-wide health table shared by all downstream clients."""
+
+    failure_threshold: int = 3
+    reset_after: float = 30.0
+    _endpoints: dict[str, EndpointHealth] = field(default_factory=dict)
+
+    def get(self, url: str) -> EndpointHealth:
+        endpoint = self._endpoints.get(url)
+        if endpoint is None:
+            endpoint = EndpointHealth(url, self.failure_threshold, self.reset_after)
+            self._endpoints[url] = endpoint
+        return endpoint
+
+    def trip_origin(self, url: str, error: str) -> None:
+        """Open ``url`` and the other closed URLs on its host: it refused the connection."""
+        origin = urlsplit(url).netloc
+        self.get(url).record_failure(error, trip=True)
+        for endpoint in self._endpoints.values():
+            if endpoint.url != url and urlsplit(endpoint.url).netloc == origin and endpoint.state == "closed":
+                endpoint.record_failure(error, trip=True)
+
+    def candidates(self, urls: Iterable[str]) -> list[str]:
+        """URLs worth trying: open circuits are skipped, recently healthy ones go first."""
+        endpoints = [self.get(url) for url in dict.fromkeys(urls)]
+        usable = [endpoint for endpoint in endpoints if endpoint.state != "open"]
+        # Stable sort: the configured order is kept among equally healthy URLs.
+        usable.sort(key=lambda endpoint: -(endpoint.last_success or 0.0) if endpoint.state == "closed" else 0.0)
+        return [endpoint.url for endpoint in usable]
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [endpoint.as_dict() for endpoint in self._endpoints.values()]
+
+
+__all__ = ["EndpointHealth", "EndpointRegistry"]
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable
+
+import aio_pika
+
+logger = logging.getLogger(__name__)
+
+Event = dict[str, Any]
+Emit = Callable[[Event], None]
+
+
+class TaskTimeline:
+    """Stage events of one task, each with the time spent since the previous stage.
+
+    ``record`` is synchronous and never blocks, so it can be called from
+    callbacks; events go straight to ``emit``.
+    """
+
+    def __init__(self, task_id: str, emit: Emit, *, source: str) -> None:
+        self.task_id = task_id
+        self.source = source
+        self._emit = emit
+        self._started = time.perf_counter()
+        self._last = self._started
+
+    def touch(self) -> None:
+        """Start measuring the next stage from now."""
+        self._last = time.perf_counter()
+
+    def record(self, stage: str, duration: float | None = None, **data: Any) -> None:
+        now = time.perf_counter()
+        if duration is None:
+            duration = now - self._last
+            self._last = now
+        event: Event = {
+            "event": "stage",
+            "task_id": self.task_id,
+            "stage": stage,
+            "duration": round(duration, 4),
+            "elapsed": round(now - self._started, 4),
+            "time": time.time(),
+            "source": self.source,
+        }
+        if data:
+            event["data"] = data
+        self._emit(event)
+
+
+@dataclass(eq=False)
+class _Subscriber:
+    queue: asyncio.Queue
+    task_id: str | None
+    dropped: int = 0
+
+    def wants(self, event: Event) -> bool:
+        return self.task_id is None or event.get("task_id") == self.task_id
+
+    def offer(self, event: Event) -> None:
+        """Enqueue without waiting; a slow reader loses its oldest events instead."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+@dataclass
+class EventHub:
+    """In-process pub/sub for slicer events with bounded memory.
+
+    The last ``history`` events are kept in a ring buffer for replay, and every
+    subscriber has a queue of ``subscriber_buffer`` events; when a subscriber
+    falls behind, its oldest events are dropped and counted. The newest event
+    of each kind and source that belongs to no task is kept in :attr:`latest`,
+    out of the ring buffer, for status endpoints.
+    """
+
+    history: int = 1000
+    subscriber_buffer: int = 256
+    _recent: deque = field(init=False)
+    _subscribers: set = field(default_factory=set, init=False)
+    latest: dict = field(default_factory=dict, init=False)
+
+    def __post_init__(self) -> None:
+        self._recent = deque(maxlen=self.history)
+
+    def publish(self, event: Event) -> None:
+        self._recent.append(event)
+        if "task_id" not in event:
+            self.latest[(event.get("event"), event.get("source"))] = event
+        for subscriber in list(self._subscribers):
+            if subscriber.wants(event):
+                subscriber.offer(event)
+
+    async def subscribe(self, *, task_id: str | None = None, replay: bool = False) -> AsyncIterator[Event]:
+        """Yield matching events (recent ones first with ``replay``) until cancelled.
+
+        After events were dropped a ``{"event": "dropped", "count": n}`` record
+        is yielded before the next event.
+        """
+        subscriber = _Subscriber(asyncio.Queue(maxsize=self.subscriber_buffer), task_id)
+        self._subscribers.add(subscriber)
+        try:
+            if replay:
+                for event in [event for event in self._recent if subscriber.wants(event)]:
+                    yield event
+            while True:
+                event = await subscriber.queue.get()
+                if subscriber.dropped:
+                    yield {"event": "dropped", "count": subscriber.dropped, "time": time.time()}
+                    subscriber.dropped = 0
+                yield event
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+
+class EventRelay:
+    """Carries events between slicer processes over a transient fanout exchange.
+
+    The RabbitMQ worker publishes its stage events here and the HTTP app, which
+    serves the SSE stream, consumes them into its :class:`EventHub`. Events are
+    best effort: they are not persisted, and when the broker is slow the local
+    buffer of ``buffer`` events drops new ones rather than delay slicing.
+    """
+
+    def __init__(self, url: str, exchange: str, *, buffer: int = 1000) -> None:
+        self.url = url
+        self.exchange_name = exchange
+        self._outbox: asyncio.Queue[Event] = asyncio.Queue(maxsize=buffer)
+        self._connection: aio_pika.abc.AbstractRobustConnection | None = None
+        self._sender: asyncio.Task | None = None
+        self.dropped = 0
+
+    async def _channel(self) -> tuple[aio_pika.abc.AbstractChannel, aio_pika.abc.AbstractExchange]:
+        if self._connection is None:
+            self._connection = await aio_pika.connect_robust(self.url)
+        channel = await self._connection.channel()
+        exchange = await channel.declare_exchange(self.exchange_name, aio_pika.ExchangeType.FANOUT)
+        return channel, exchange
+
+    def emit(self, event: Event) -> None:
+        """Queue an event for publishing; never blocks the caller."""
+        try:
+            self._outbox.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.create_task(self._send())
+
+    async def _send(self) -> None:
+        try:
+            _, exchange = await self._channel()
+        except Exception:  # pragma: no cover - broker outage
+            # Restarted by the next emit(); events queued meanwhile are kept.
+            logger.warning("Slicer event relay is not connected", exc_info=True)
+            return
+        while True:
+            event = await self._outbox.get()
+            try:
+                await exchange.publish(
+                    aio_pika.Message(
+                        body=json.dumps(event, ensure_ascii=False).encode(),
+                        content_type="application/json",
+                        delivery_mode=aio_pika.DeliveryMode.NOT_PERSISTENT,
+                    ),
+                    routing_key="",
+                )
+            except Exception:  # pragma: no cover - broker outage
+                self.dropped += 1
+                logger.warning("Dropping slicer event for task %s", event.get("task_id"), exc_info=True)
+
+    async def consume(self, hub: EventHub) -> None:
+        """Feed events from every slicer process into ``hub``; runs until cancelled."""
+        channel, exchange = await self._channel()
+        queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+        await queue.bind(exchange)
+        async with queue.iterator(no_ack=True) as messages:
+            async for message in messages:
+                try:
+                    hub.publish(json.loads(message.body))
+                except ValueError:
+                    logger.warning("Ignoring malformed slicer event")
+
+    async def close(self) -> None:
+        if self._sender is not None:
+            self._sender.cancel()
+            await asyncio.gather(self._sender, return_exceptions=True)
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+__all__ = ["Event", "EventHub", "EventRelay", "TaskTimeline"]
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ExecutionTiming:
+    """Where the time of one offloaded call went, in seconds."""
+
+    queued: float
+    executing: float
+
+    def as_dict(self) -> dict[str, float]:
+        return {"queued": round(self.queued, 4), "executing": round(self.executing, 4)}
+
+
+@dataclass(frozen=True)
+class TimedResult(Generic[T]):
+    value: T
+    timing: ExecutionTiming
+
+
+def _timed_call(func: Callable[..., T], *args: object) -> tuple[T, float, float]:
+    started = time.time()
+    value = func(*args)
+    return value, started, time.time()
+
+
+class CpuExecutor:
+    """Bounded process pool for CPU-bound work that must not block the event loop.
+
+    At most ``workers`` calls are submitted at once; further callers wait on a
+    semaphore rather than piling pickled payloads into the pool's queue. Child
+    processes are started with ``spawn`` so they never inherit the parent's
+    event loop, sockets or threads. With ``workers=0`` calls run in a thread of
+    the current process instead, which is handy for debugging.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = max(0, workers)
+        self._semaphore = asyncio.Semaphore(max(1, self.workers))
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    async def run(self, func: Callable[..., T], *args: object) -> TimedResult[T]:
+        """Run ``func(*args)`` off the loop and report queued vs executing time."""
+        submitted = time.time()
+        async with self._semaphore:
+            if self.workers:
+                loop = asyncio.get_running_loop()
+                value, started, finished = await loop.run_in_executor(self._ensure_pool(), _timed_call, func, *args)
+            else:
+                value, started, finished = await asyncio.to_thread(_timed_call, func, *args)
+
+        timing = ExecutionTiming(queued=max(0.0, started - submitted), executing=finished - started)
+        logger.info(
+            "%s: queued %.3fs, executing %.3fs",
+            getattr(func, "__name__", "call"),
+            timing.queued,
+            timing.executing,
+        )
+        return TimedResult(value=value, timing=timing)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+__all__ = ["CpuExecutor", "ExecutionTiming", "TimedResult"]
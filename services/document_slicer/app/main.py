@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import asyncio
+import json
+import logging
 import time
-from typing import List
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Optional
 
 from fastapi import FastAPI, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,12 +14,44 @@ from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
 from .config import Settings
+from .events import EventHub, EventRelay, TaskTimeline
+from .executor import ExecutionTiming
 from .pipeline import DocumentPipeline
 
-app = FastAPI(title="Document Splitter Service", version="0.1.0")
 settings = Settings()
 pipeline = DocumentPipeline(settings=settings)
 
+
+events = EventHub(history=settings.events_history, subscriber_buffer=settings.events_subscriber_buffer)
+relay = EventRelay(settings.rabbitmq_url, settings.events_exchange)
+logger = logging.getLogger(__name__)
+
+
+async def _relay_events() -> None:
+    """Forward stage events of the RabbitMQ worker into the local hub."""
+    try:
+        await relay.consume(events)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.warning("Slicer event relay unavailable; only HTTP tasks are reported", exc_info=True)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    relay_task = asyncio.create_task(_relay_events()) if settings.events_relay else None
+    try:
+        yield
+    finally:
+        if relay_task is not None:
+            relay_task.cancel()
+            await asyncio.gather(relay_task, return_exceptions=True)
+        await relay.close()
+        await pipeline.aclose()
+
+
+app = FastAPI(title="Document Splitter Service", version="0.1.0", lifespan=lifespan)
+
 app.mount("/static", StaticFiles(directory="static"), name="static")
 app.add_middleware(
     CORSMiddleware,
@@ -25,65 +61,94 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-subscribers: List[asyncio.Queue] = []
+def _format_event(event: dict[str, Any]) -> str:
+    # start/stop keep their original bare-timestamp payload for static/time.html.
+    if event["event"] in {"start", "stop"}:
+        data = str(event["time"])
+    else:
+        data = json.dumps(event, ensure_ascii=False)
+    return f"event: {event['event']}\ndata: {data}\n\n"
 
 
 @app.get("/api/timer/events")
-async def timer_events():
-    """Потоковое подключение для вывода прогресса обработки."""
-    queue: asyncio.Queue = asyncio.Queue()
-    subscribers.append(queue)
+async def timer_events(task_id: Optional[str] = None, replay: Optional[bool] = None):
+    """Потоковое подключение для вывода прогресса обработки.
+
+    Кроме ``start``/``stop`` отправляются события ``stage`` по этапам каждой
+    задачи; ``task_id`` оставляет только события одной задачи, а ``replay``
+    (по умолчанию включён вместе с ``task_id``) сначала отдаёт недавние.
+    """
+    history = replay if replay is not None else task_id is not None
 
     async def event_stream():
         try:
-            while True:
-                msg = await queue.get()
-                yield f"event: {msg['event']}\ndata: {msg['time']}\n\n"
+            async for event in events.subscribe(task_id=task_id, replay=history):
+                yield _format_event(event)
         except asyncio.CancelledError:
             pass
-        finally:
-            subscribers.remove(queue)
 
     return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 
-async def broadcast(event: str, timestamp: float):
+def broadcast(event: str, timestamp: float, task_id: str | None = None) -> None:
     """Рассылает событие всем слушателям /api/timer/events."""
-    data = {"event": event, "time": timestamp}
-    for q in subscribers:
-        await q.put(data)
+    events.publish({"event": event, "time": timestamp, "task_id": task_id})
+
+
+def _timing_headers(timing: ExecutionTiming) -> dict[str, str]:
+    """Expose how long extraction waited for a worker and how long it ran."""
+    return {
+        "X-Extract-Queued": f"{timing.queued:.4f}",
+        "X-Extract-Executing": f"{timing.executing:.4f}",
+    }
+
+
+def _timeline() -> TaskTimeline:
+    return TaskTimeline(uuid.uuid4().hex, events.publish, source="http")
+
+
+async def _receive(file: UploadFile, timeline: TaskTimeline) -> tuple[str, bytes]:
+    file_name, content = await pipeline.read_upload(file)
+    timeline.record("received", size=len(content))
+    return file_name, content
 
 
 @app.post("/api/sections/split")
 async def split_document(file: UploadFile = File(...)) -> JSONResponse:
-    file_name, content = await pipeline.read_upload(file)
-    parts = pipeline.extract_parts(file_name, content)
-    pipeline.persist_sections(parts)
-    return JSONResponse(content=parts)
+    timeline = _timeline()
+    file_name, content = await _receive(file, timeline)
+    parts, timing = await pipeline.extract_parts_async(file_name, content, timeline=timeline)
+    await pipeline.persist_sections(timeline.task_id, parts, timeline=timeline)
+    return JSONResponse(content=parts, headers={**_timing_headers(timing), "X-Task-Id": timeline.task_id})
 
 
 @app.post("/test")
 async def test_split_document(file: UploadFile = File(...)) -> JSONResponse:
-    file_name, content = await pipeline.read_upload(file)
-    parts = pipeline.extract_parts(file_name, content)
-    return JSONResponse(content=parts)
+    timeline = _timeline()
+    file_name, content = await _receive(file, timeline)
+    parts, timing = await pipeline.extract_parts_async(file_name, content, timeline=timeline)
+    return JSONResponse(content=parts, headers={**_timing_headers(timing), "X-Task-Id": timeline.task_id})
 
 
 @app.post("/api/sections/dispatch")
 async def dispatch_sections(file: UploadFile = File(...)) -> JSONResponse:
-    start = time.time()
-    await broadcast("start", start)
+    timeline = _timeline()
+    broadcast("start", time.time(), timeline.task_id)
 
-    file_name, content = await pipeline.read_upload(file)
-    parts = pipeline.extract_parts(file_name, content)
-    saved_paths = pipeline.persist_sections(parts)
+    file_name, content = await _receive(file, timeline)
 
-    responses = await pipeline.dispatch(parts=parts, sections_path=saved_paths["sections"])
+    parts, _ = await pipeline.extract_parts_async(file_name, content, timeline=timeline)
+    # Services get the parts from memory; the on-disk copy is only for
+    # observability, so it is written while the requests are in flight.
+    _, responses = await asyncio.gather(
+        pipeline.persist_sections(timeline.task_id, parts, timeline=timeline),
+        pipeline.dispatch(parts=parts, timeline=timeline),
+    )
 
     stop = time.time()
-    await broadcast("stop", stop)
+    broadcast("stop", stop, timeline.task_id)
 
-    return JSONResponse(content=responses)
+    return JSONResponse(content=responses, headers={"X-Task-Id": timeline.task_id})
 
 
 @app.post("/api/dispatcher")
@@ -97,6 +162,24 @@ async def time_page():
     return FileResponse("static/time.html")
 
 
+@app.get("/api/parse-cache/stats")
+async def parse_cache_stats() -> dict[str, Any]:
+    """Counters of this process's cache plus the last ones relayed by the RabbitMQ worker."""
+    cache = pipeline.parse_cache
+    worker = events.latest.get(("parse_cache", "rabbit"))
+    return {
+        "enabled": cache is not None,
+        **(cache.stats() if cache is not None else {}),
+        "rabbit_worker": {"time": worker["time"], **worker["stats"]} if worker else None,
+    }
+
+
+@app.get("/api/dispatch/health")
+async def dispatch_health() -> dict[str, Any]:
+    """Cached health and circuit state of every downstream URL seen so far."""
+    return {"endpoints": pipeline.endpoints.snapshot()}
+
+
 @app.get("/health")
 async def health() -> dict[str, str]:
     return {"status": "ok"}
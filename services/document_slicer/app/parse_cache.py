@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from .document.reader import DocumentSource
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def document_digest(content: DocumentSource) -> str:
+    """SHA-256 of an uploaded document given as bytes or a file path; blocking."""
+    if isinstance(content, (bytes, bytearray)):
+        return hashlib.sha256(content).hexdigest()
+    digest = hashlib.sha256()
+    with Path(content).open("rb") as file:
+        while chunk := file.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_key(digest: str, file_name: str, version: str) -> str:
+    """Cache key for a parse: the document digest scoped by parser version and file type."""
+    suffix = Path(file_name or "").suffix.lower()
+    return hashlib.sha256(f"{version}\0{suffix}\0{digest}".encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """Two-tier cache of parse results: an in-memory LRU in front of JSON files.
+
+    The memory tier holds the ``max_memory_entries`` most recently used results.
+    Misses fall through to ``<directory>/<aa>/<key>.json``, written through a
+    temporary file plus rename so concurrent slicers can share the directory.
+    A disk hit refreshes the file's mtime and is promoted to memory; the disk
+    tier keeps the newest ``max_disk_entries`` files. File I/O runs in worker
+    threads.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        max_memory_entries: int = 256,
+        max_disk_entries: int = 10000,
+        prune_interval: float = 300.0,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.prune_interval = prune_interval
+        self._memory: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._last_prune = 0.0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _remember(self, key: str, value: dict[str, Any]) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return value
+
+        try:
+            value = await asyncio.to_thread(self._read, key)
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable parse cache entry %s", key)
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        self._remember(key, value)
+        return value
+
+    def _read(self, key: str) -> dict[str, Any] | None:
+        path = self._path(key)
+        try:
+            value = json.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return value
+
+    async def put(self, key: str, value: dict[str, Any]) -> None:
+        self._remember(key, value)
+        try:
+            await asyncio.to_thread(self._write, key, value)
+        except (OSError, TypeError, ValueError):
+            logger.exception("Failed to store parse cache entry %s", key)
+            return
+        self.stores += 1
+
+    def _write(self, key: str, value: dict[str, Any]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        body = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        handle, name = tempfile.mkstemp(prefix=".incoming-", dir=path.parent)
+        try:
+            with os.fdopen(handle, "wb") as file:
+                file.write(body)
+            os.replace(name, path)
+        except BaseException:
+            Path(name).unlink(missing_ok=True)
+            raise
+        if time.monotonic() - self._last_prune >= self.prune_interval:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Drop the least recently used files beyond ``max_disk_entries``."""
+        self._last_prune = time.monotonic()
+        entries: list[tuple[float, Path]] = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort(reverse=True)
+        for _, path in entries[self.max_disk_entries:]:
+            path.unlink(missing_ok=True)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+        }
+
+
+__all__ = ["ParseCache", "document_digest", "parse_key"]
@@ -1,18 +1,39 @@
 from __future__ import annotations
 
 import asyncio
-import json
-from pathlib import Path
+import logging
+import time
 from typing import Any, Dict
 
 import httpx
 from fastapi import HTTPException, UploadFile
 
-from .clients import AiEconomClient, AiLegalClient, ContractExtractorClient, ServiceResult
+from .clients import (
+    AiEconomClient,
+    AiLegalClient,
+    ContractExtractorClient,
+    ServiceResult,
+    create_http_client,
+    encode_sections,
+)
 from .config import Settings
-from .document.reader import load_blocks
-from .document.spec_extractor import extract_specification_from_blocks
-from .services.section_splitter import SectionChunk, split_into_sections
+from .document.reader import DOCX_READER, DocumentSource, iter_blocks
+from .document.spec_extractor import SpecificationResult, extract_specification_from_blocks
+from .endpoint_health import EndpointRegistry
+from .events import TaskTimeline
+from .executor import CpuExecutor, ExecutionTiming
+from .parse_cache import ParseCache, document_digest, parse_key
+from .section_store import SavedSections, SectionStore
+from .services.document_analyzer import analyze_blocks
+from .services.section_splitter import SectionChunk
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever parsing or slicing output changes so cached parses are not reused.
+PARSER_VERSION = f"1-{DOCX_READER}"
+
+class DocumentParseError(ValueError):
+    """Raised when an uploaded file cannot be parsed into document blocks."""
 
 
 class SectionSerializer:
@@ -57,25 +78,88 @@ class SpecificationExtractor:
     def extract(blocks: list[Any]) -> str:
         """Convert detected tables into a plain-text representation for part_16."""
         try:
-            spec_result = extract_specification_from_blocks(blocks)
-            lines = []
-            for table_region in spec_result.tables:
-                for row in table_region.block.rows or []:
-                    row_text = " | ".join(cell.strip() for cell in row)
-                    lines.append(f"TABLE: {row_text}")
-
-            return "\n".join(lines)
+            return SpecificationExtractor.render(extract_specification_from_blocks(blocks))
         except Exception:
             return ""
 
+    @staticmethod
+    def render(spec_result: SpecificationResult | None) -> str:
+        if spec_result is None:
+            return ""
+        lines = []
+        for table_region in spec_result.tables:
+            for row in table_region.block.rows or []:
+                row_text = " | ".join(cell.strip() for cell in row)
+                lines.append(f"TABLE: {row_text}")
+
+        return "\n".join(lines)
+
+
+def _specification_to_dict(spec_result: SpecificationResult | None) -> dict[str, Any] | None:
+    if spec_result is None:
+        return None
+    return {
+        "heading": spec_result.heading,
+        "start_index": spec_result.start_index,
+        "end_index": spec_result.end_index,
+        "tables": [{"index": region.index, "rows": region.block.rows or []} for region in spec_result.tables],
+    }
+
+
+def analyze_document(file_name: str, content: DocumentSource) -> dict[str, Any]:
+    """Parse a document into ``parts`` and its ``specification`` table regions.
+
+    Module-level so it can run in a worker process; the result is plain JSON so
+    it can be cached as is.
+    """
+    # Blocks stream from the reader straight into the fused analyzer, so the
+    # document is traversed once and never materialized as a list.
+    try:
+        analysis = analyze_blocks(iter_blocks(file_name, content))
+    except Exception as exc:  # pragma: no cover - defensive parsing guard
+        raise DocumentParseError(str(exc)) from exc
+
+    specification_text = SpecificationExtractor.render(analysis.specification)
+    return {
+        "parts": SectionSerializer.serialize(analysis.sections, specification_text),
+        "specification": _specification_to_dict(analysis.specification),
+        "timings": analysis.timings,
+    }
+
+
+def extract_document_parts(file_name: str, content: DocumentSource) -> dict[str, str]:
+    """Parse and slice a document; module-level so it can run in a worker process."""
+    return analyze_document(file_name, content)["parts"]
+
 
 class DocumentPipeline:
     """High-level pipeline that reads uploads, slices sections, and dispatches them to services."""
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
-        self.ai_econom_client = AiEconomClient(settings)
-        self.ai_legal_client = AiLegalClient(settings)
-        self.contract_extractor_client = ContractExtractorClient(settings)
+        self.executor = CpuExecutor(settings.extract_workers)
+        self.section_store = SectionStore(
+            settings.sections_dir,
+            compress_threshold=settings.sections_compress_threshold,
+            retention_seconds=settings.sections_retention,
+            max_tasks=settings.sections_max_tasks,
+        )
+        self.parse_cache = (
+            ParseCache(
+                settings.parse_cache_dir,
+                max_memory_entries=settings.parse_cache_memory_entries,
+                max_disk_entries=settings.parse_cache_disk_entries,
+            )
+            if settings.parse_cache_enabled
+            else None
+        )
+        self.endpoints = EndpointRegistry(
+            failure_threshold=settings.circuit_failure_threshold,
+            reset_after=settings.circuit_reset_seconds,
+        )
+        self._http_client: httpx.AsyncClient | None = None
+        self.ai_econom_client = AiEconomClient(settings, endpoints=self.endpoints)
+        self.ai_legal_client = AiLegalClient(settings, endpoints=self.endpoints)
+        self.contract_extractor_client = ContractExtractorClient(settings, endpoints=self.endpoints)
 
     async def read_upload(self, file: UploadFile) -> tuple[str, bytes]:
         """Read an uploaded file into memory and validate that it is non-empty."""
@@ -85,39 +169,85 @@ class DocumentPipeline:
         filename = file.filename or "document.docx"
         return filename, content
 
-    def extract_parts(self, file_name: str, content: bytes) -> dict[str, str]:
-        """Slice a DOCX payload into numbered sections plus a specification block."""
+    def extract_parts(self, file_name: str, content: DocumentSource) -> dict[str, str]:
+        """Slice a DOCX payload (bytes or a blob path) into numbered sections plus a specification block."""
         try:
-            blocks = load_blocks(file_name, content)
-        except Exception as exc:  # pragma: no cover - defensive parsing guard
+            return extract_document_parts(file_name, content)
+        except DocumentParseError as exc:
             raise HTTPException(status_code=400, detail=f"Не удалось разобрать файл: {exc}") from exc
 
-        sections = split_into_sections(blocks)
-        specification_text = SpecificationExtractor.extract(blocks)
-        return SectionSerializer.serialize(sections, specification_text)
+    async def extract_parts_async(
+        self,
+        file_name: str,
+        content: DocumentSource,
+        *,
+        digest: str | None = None,
+        timeline: TaskTimeline | None = None,
+    ) -> tuple[dict[str, str], ExecutionTiming]:
+        """Run :meth:`extract_parts` in the process pool so the event loop stays responsive.
+
+        Results are looked up in the parse cache first; ``digest`` is the
+        document's SHA-256 when the caller already knows it (blob references).
+        ``timeline`` receives ``parsed``, ``split`` and ``spec_extracted`` events.
+        """
+        key = None
+        if self.parse_cache is not None:
+            if digest is None:
+                digest = await asyncio.to_thread(document_digest, content)
+            key = parse_key(digest, file_name, PARSER_VERSION)
+            cached = await self.parse_cache.get(key)
+            if cached is not None:
+                if timeline is not None:
+                    timeline.record("parsed", cached=True)
+                return dict(cached["parts"]), ExecutionTiming(queued=0.0, executing=0.0)
 
-    def persist_sections(self, parts: dict[str, str]) -> dict[str, Path]:
-        """Persist generated parts to disk for observability and reuse."""
-        self.settings.ensure_data_dir()
-
-        sections_path = self.settings.sections_path
-        part_16_path = self.settings.part_16_path
+        try:
+            result = await self.executor.run(analyze_document, file_name, content)
+        except DocumentParseError as exc:
+            raise HTTPException(status_code=400, detail=f"Не удалось разобрать файл: {exc}") from exc
 
+        analysis = result.value
+        timings = analysis.pop("timings", {})
+        if timeline is not None:
+            # Stages interleave in the single pass, so each reports its own share
+            # of the executing time; the wait for a worker is reported with parsing.
+            timeline.record("parsed", timings.get("parse", 0.0), queued=round(result.timing.queued, 4))
+            timeline.record("split", timings.get("split", 0.0))
+            timeline.record("spec_extracted", timings.get("spec", 0.0))
+            timeline.touch()
+        if key is not None:
+            await self.parse_cache.put(key, analysis)
+        return analysis["parts"], result.timing
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Pooled client shared by every dispatch, created on first use."""
+        if self._http_client is None:
+            self._http_client = create_http_client(self.settings)
+        return self._http_client
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+    async def aclose(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        self.close()
+
+    async def persist_sections(
+        self, task_id: str, parts: dict[str, str], *, timeline: TaskTimeline | None = None
+    ) -> SavedSections | None:
+        """Persist generated parts under the task's own directory for observability and reuse."""
+        started = time.perf_counter()
         try:
-            sections_path.write_text(
-                json.dumps(parts, ensure_ascii=False, indent=2),
-                encoding="utf-8",
-            )
-            part_16_payload = {"part_16": parts.get("part_16", "")}
-            part_16_path.write_text(
-                json.dumps(part_16_payload, ensure_ascii=False, indent=2),
-                encoding="utf-8",
-            )
+            saved = await self.section_store.save_async(task_id, parts)
         except OSError:
-            # Best-effort persistence; errors are not fatal for request
-            pass
-
-        return {"sections": sections_path, "part_16": part_16_path}
+            logger.warning("Failed to persist sections for task %s", task_id, exc_info=True)
+            saved = None
+        if timeline is not None:
+            timeline.record("persisted", time.perf_counter() - started, ok=saved is not None)
+        return saved
 
     def _select_contract_sections(self, parts: dict[str, str]) -> dict[str, str]:
         """Select only the section subset required by contract_extractor."""
@@ -126,6 +256,19 @@ class DocumentPipeline:
         }
         return {key: value for key, value in selected.items() if value}
 
+    @staticmethod
+    def _record_dispatch(timeline: TaskTimeline, task: asyncio.Task, started: float) -> None:
+        if task.cancelled() or task.exception() is not None:
+            return
+        result: ServiceResult = task.result()
+        timeline.record(
+            "dispatched",
+            time.perf_counter() - started,
+            service=result.service,
+            url=result.url,
+            status=result.status,
+        )
+
     @staticmethod
     def _collect_responses(service_results: list[ServiceResult]) -> dict[str, Any]:
         """Merge responses from async service calls into a single payload."""
@@ -156,7 +299,7 @@ class DocumentPipeline:
 
         return responses
 
-    async def dispatch(self, parts: Dict[str, str], sections_path: Path) -> Dict[str, Any]:
+    async def dispatch(self, parts: Dict[str, str], *, timeline: TaskTimeline | None = None) -> Dict[str, Any]:
         """Send prepared sections to all downstream services in parallel."""
         contract_sections = self._select_contract_sections(parts)
         if not contract_sections:
@@ -171,18 +314,23 @@ class DocumentPipeline:
 
         payload = {"sections": contract_sections}
 
-        async with httpx.AsyncClient(timeout=self.settings.http_timeout, trust_env=False) as client:
-            ai_econom_task = asyncio.create_task(
-                self.ai_econom_client.analyze(client, sections_path)
-            )
-            ai_legal_task = asyncio.create_task(
-                self.ai_legal_client.analyze(client, sections_path)
-            )
-            contract_extractor_task = asyncio.create_task(
-                self.contract_extractor_client.extract(client, payload)
-            )
-            service_results = await asyncio.gather(
-                ai_econom_task, ai_legal_task, contract_extractor_task
-            )
+        client = self.http_client
+        sections = encode_sections(parts)
+        ai_econom_task = asyncio.create_task(
+            self.ai_econom_client.analyze(client, sections)
+        )
+        ai_legal_task = asyncio.create_task(
+            self.ai_legal_client.analyze(client, sections)
+        )
+        contract_extractor_task = asyncio.create_task(
+            self.contract_extractor_client.extract(client, payload)
+        )
+        if timeline is not None:
+            started = time.perf_counter()
+            for task in (ai_econom_task, ai_legal_task, contract_extractor_task):
+                task.add_done_callback(lambda done: self._record_dispatch(timeline, done, started))
+        service_results = await asyncio.gather(
+            ai_econom_task, ai_legal_task, contract_extractor_task
+        )
 
         return self._collect_responses(service_results)
@@ -2,35 +2,49 @@ from __future__ import annotations
 
 import asyncio
 import base64
-import json
-import os
+import logging
+import time
 import uuid
-from typing import Any, Dict
 
 import aio_pika
 
+from .blob_store import BlobRef, BlobStore
+from .codec import decode_message
 from .config import Settings
+from .document.reader import DocumentSource
+from .events import Emit, EventRelay, TaskTimeline
 from .pipeline import DocumentPipeline
+from .publisher import ExchangeRoute, RabbitPublisher, shard_queue
 
+logger = logging.getLogger(__name__)
 
-async def _publish_message(
-    channel: aio_pika.Channel,
-    queue_name: str,
-    payload: Dict[str, Any],
-    *,
-    correlation_id: str,
-    reply_to: str | None,
+
+def _resolve_content(payload: dict, blob_store: BlobStore) -> DocumentSource | None:
+    """Return the uploaded document as a blob path (claim check) or inline bytes."""
+    content_ref = payload.get("content_ref")
+    if content_ref:
+        return blob_store.resolve(BlobRef.from_dict(content_ref))
+
+    encoded = payload.get("content")
+    if not encoded:
+        return None
+    return base64.b64decode(encoded)
+
+
+async def _publish_failure(
+    publisher: RabbitPublisher, settings: Settings, correlation_id: str, reply_to: str | None, error: str
 ) -> None:
-    queue = await channel.declare_queue(queue_name, durable=True)
-    await channel.default_exchange.publish(
-        aio_pika.Message(
-            body=json.dumps(payload).encode(),
-            correlation_id=correlation_id,
-            reply_to=reply_to,
-            content_type="application/json",
-            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-        ),
-        routing_key=queue.name,
+    """Answer an upload that cannot be read, so the client does not wait for its timeout.
+
+    The aggregator has no pending services for the task, so this result is
+    published as the final one right away.
+    """
+    logger.warning("Upload %s failed: %s", correlation_id, error)
+    await publisher.publish(
+        shard_queue(settings.aggregation_results_queue, correlation_id, settings.aggregator_shards),
+        {"service": "document_slicer", "payload": {"error": error}},
+        correlation_id=correlation_id,
+        reply_to=reply_to,
     )
 
 
@@ -39,86 +53,119 @@ async def handle_upload(
     *,
     pipeline: DocumentPipeline,
     settings: Settings,
+    publisher: RabbitPublisher,
+    blob_store: BlobStore,
+    emit: Emit,
 ) -> None:
     async with message.process():
-        payload = json.loads(message.body.decode())
+        # A malformed message, a pruned blob or a bad content_ref still gets
+        # an answer instead of leaving the client to its timeout.
+        payload: dict = {}
+        try:
+            payload = decode_message(message)
+            content = _resolve_content(payload, blob_store)
+        except (OSError, ValueError) as exc:
+            content, error = None, f"Uploaded document is unavailable: {exc}"
+        else:
+            error = "Upload message carries no document"
         correlation_id = message.correlation_id or payload.get("task_id") or str(uuid.uuid4())
         reply_to = message.reply_to or payload.get("reply_to")
-
-        encoded = payload.get("content")
-        if not encoded:
+        if content is None:
+            await _publish_failure(publisher, settings, correlation_id, reply_to, error)
             return
 
-        content = base64.b64decode(encoded)
-        file_name = payload.get("filename", "document.docx")
-
-        parts = pipeline.extract_parts(file_name, content)
-        pipeline.persist_sections(parts)
-
-        connection = await aio_pika.connect_robust(settings.rabbitmq_url)
-        async with connection:
-            channel = await connection.channel()
+        timeline = TaskTimeline(correlation_id, emit, source="rabbit")
+        timeline.record("received", size=len(content) if isinstance(content, bytes) else content.stat().st_size)
 
-            expected_services = ["ai_legal", "ai_econom", "ai_accountant", "contract_extractor"]
-            await _publish_message(
-                channel,
-                settings.aggregation_queue,
-                {
-                    "task_id": correlation_id,
-                    "reply_to": reply_to,
-                    "expected_services": expected_services,
-                },
-                correlation_id=correlation_id,
-                reply_to=reply_to,
-            )
-
-            await _publish_message(
-                channel,
-                settings.ai_legal_queue,
-                {"task_id": correlation_id, "parts": parts},
-                correlation_id=correlation_id,
-                reply_to=reply_to,
-            )
+        file_name = payload.get("filename", "document.docx")
 
-            ai_econom_parts = {key: value for key, value in parts.items() if key in settings.ai_econom_sections}
-            await _publish_message(
-                channel,
-                settings.ai_econom_queue,
-                {"task_id": correlation_id, "parts": ai_econom_parts},
-                correlation_id=correlation_id,
-                reply_to=reply_to,
-            )
+        # Blobs are content-addressed, so a claim check already carries the digest.
+        content_ref = payload.get("content_ref")
+        digest = BlobRef.from_dict(content_ref).digest if content_ref else None
+        parts, _ = await pipeline.extract_parts_async(file_name, content, digest=digest, timeline=timeline)
+        await pipeline.persist_sections(correlation_id, parts, timeline=timeline)
+
+        # Parts are stored once and a single envelope with their reference goes to
+        # the documents exchange; each bound service loads only the parts it needs.
+        parts_ref = (await asyncio.to_thread(blob_store.put_json, parts)).as_dict()
+        timeline.record("stored")
+
+        await publisher.publish_batch(
+            [
+                (
+                    shard_queue(settings.aggregation_queue, correlation_id, settings.aggregator_shards),
+                    {
+                        "task_id": correlation_id,
+                        "reply_to": reply_to,
+                        "expected_services": settings.expected_services,
+                        "notify_progress": bool(payload.get("notify_progress")),
+                        "deadline_seconds": settings.task_deadline or None,
+                        "service_deadlines": settings.service_deadlines,
+                        "send_supplements": settings.send_supplements,
+                    },
+                ),
+                (
+                    ExchangeRoute(
+                        settings.documents_exchange,
+                        settings.documents_routing_key,
+                        tuple(settings.documents_queues),
+                    ),
+                    {"task_id": correlation_id, "parts_ref": parts_ref},
+                ),
+            ],
+            correlation_id=correlation_id,
+            reply_to=reply_to,
+            on_confirm=lambda target, seconds: timeline.record("published", seconds, queue=target),
+        )
 
-            ai_accountant_parts = {key: value for key, value in parts.items() if key in settings.ai_accountant_sections}
-            await _publish_message(
-                channel,
-                settings.ai_accountant_queue,
-                {"task_id": correlation_id, "parts": ai_accountant_parts},
-                correlation_id=correlation_id,
-                reply_to=reply_to,
-            )
 
-            contract_parts = {key: value for key, value in parts.items() if key in settings.contract_extractor_sections}
-            await _publish_message(
-                channel,
-                settings.contract_extractor_queue,
-                {"task_id": correlation_id, "sections": contract_parts},
-                correlation_id=correlation_id,
-                reply_to=reply_to,
-            )
+async def _report_parse_cache(pipeline: DocumentPipeline, emit: Emit, interval: float) -> None:
+    """Log the worker's parse cache counters and relay them to the HTTP app's stats endpoint."""
+    cache = pipeline.parse_cache
+    if cache is None or interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        stats = cache.stats()
+        logger.info("Parse cache: %s", ", ".join(f"{key}={value}" for key, value in stats.items()))
+        emit({"event": "parse_cache", "source": "rabbit", "time": time.time(), "stats": stats})
 
 
 async def main() -> None:
     settings = Settings()
     pipeline = DocumentPipeline(settings=settings)
+    publisher = RabbitPublisher(settings.rabbitmq_url, channel_pool_size=settings.publisher_channels)
+    blob_store = BlobStore(settings.blob_store_dir)
+    relay = EventRelay(settings.rabbitmq_url, settings.events_exchange)
+    emit: Emit = relay.emit if settings.events_relay else (lambda event: None)
+    await publisher.connect()
     connection = await aio_pika.connect_robust(settings.rabbitmq_url)
+    reporter = asyncio.create_task(_report_parse_cache(pipeline, emit, settings.parse_cache_report_interval))
 
-    async with connection:
-        channel = await connection.channel()
-        queue = await channel.declare_queue(settings.upload_queue, durable=True)
-        await queue.consume(lambda message: handle_upload(message, pipeline=pipeline, settings=settings))
-        await asyncio.Future()
+    try:
+        async with connection:
+            channel = await connection.channel()
+            # Enough unacked uploads to keep every extraction worker busy.
+            await channel.set_qos(prefetch_count=max(1, settings.extract_workers))
+            queue = await channel.declare_queue(settings.upload_queue, durable=True)
+            await queue.consume(
+                lambda message: handle_upload(
+                    message,
+                    pipeline=pipeline,
+                    settings=settings,
+                    publisher=publisher,
+                    blob_store=blob_store,
+                    emit=emit,
+                )
+            )
+            await asyncio.Future()
+    finally:
+        reporter.cancel()
+        await publisher.close()
+        await relay.close()
+        pipeline.close()
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(main())
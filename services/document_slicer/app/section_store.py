@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - compression is optional
+    zstandard = None
+
+_SAFE_TASK_ID_RE = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+ZSTD_SUFFIX = ".zst"
+
+
+@dataclass(frozen=True, slots=True)
+class SavedSections:
+    """Artifacts written for one task."""
+
+    task_dir: Path
+    sections: Path
+    part_16: Path
+
+    def as_dict(self) -> dict[str, Path]:
+        return {"sections": self.sections, "part_16": self.part_16}
+
+
+class SectionStore:
+    """Per-task, content-addressed storage for sliced sections.
+
+    Every task gets its own directory ``<root>/<task_id>/`` and each artifact is
+    named after the sha256 of its encoded bytes, so concurrent uploads never
+    overwrite each other and re-saving identical parts is a no-op. Files are
+    written through a temporary file plus rename; JSON is compact and, when
+    ``zstandard`` is installed, compressed above ``compress_threshold`` bytes.
+    Task directories older than ``retention_seconds`` or beyond the newest
+    ``max_tasks`` are pruned at most once per ``prune_interval``.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        compress_threshold: int = 0,
+        retention_seconds: float = 24 * 3600,
+        max_tasks: int = 1000,
+        prune_interval: float = 60.0,
+    ) -> None:
+        self.root = Path(root)
+        self.compress_threshold = compress_threshold
+        self.retention_seconds = retention_seconds
+        self.max_tasks = max_tasks
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+
+    def task_dir(self, task_id: str) -> Path:
+        if not _SAFE_TASK_ID_RE.match(task_id) or task_id.strip(".") == "":
+            task_id = hashlib.sha256(task_id.encode("utf-8")).hexdigest()
+        return self.root / task_id
+
+    def _encode(self, payload: Any) -> tuple[bytes, str]:
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if zstandard is not None and 0 < self.compress_threshold <= len(data):
+            return zstandard.ZstdCompressor().compress(data), ".json" + ZSTD_SUFFIX
+        return data, ".json"
+
+    def _write(self, directory: Path, stem: str, payload: Any) -> Path:
+        data, suffix = self._encode(payload)
+        digest = hashlib.sha256(data).hexdigest()
+        target = directory / f"{stem}-{digest[:16]}{suffix}"
+        if target.exists():
+            return target
+
+        handle, name = tempfile.mkstemp(prefix=".incoming-", dir=directory)
+        try:
+            with os.fdopen(handle, "wb") as file:
+                file.write(data)
+            os.replace(name, target)
+        except BaseException:
+            Path(name).unlink(missing_ok=True)
+            raise
+        return target
+
+    def save(self, task_id: str, parts: dict[str, str]) -> SavedSections:
+        """Write ``parts`` and the part_16 extract for ``task_id``; blocking."""
+        directory = self.task_dir(task_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        saved = SavedSections(
+            task_dir=directory,
+            sections=self._write(directory, "sections", parts),
+            part_16=self._write(directory, "part_16", {"part_16": parts.get("part_16", "")}),
+        )
+        os.utime(directory)
+        if time.monotonic() - self._last_prune >= self.prune_interval:
+            self.prune()
+        return saved
+
+    async def save_async(self, task_id: str, parts: dict[str, str]) -> SavedSections:
+        """Same as :meth:`save`, run in a thread so the event loop is never blocked."""
+        return await asyncio.to_thread(self.save, task_id, parts)
+
+    def prune(self) -> int:
+        """Remove expired task directories and the oldest ones beyond ``max_tasks``."""
+        self._last_prune = time.monotonic()
+        if not self.root.exists():
+            return 0
+
+        entries: list[tuple[float, Path]] = []
+        for path in self.root.iterdir():
+            try:
+                if path.is_dir():
+                    entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        entries.sort(reverse=True)
+
+        cutoff = time.time() - self.retention_seconds
+        removed = 0
+        for position, (mtime, path) in enumerate(entries):
+            if mtime >= cutoff and position < self.max_tasks:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        return removed
+
+
+def open_artifact(path: Path) -> IO[bytes]:
+    """Open a stored artifact as a stream of plain JSON bytes."""
+    if path.name.endswith(ZSTD_SUFFIX):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        return zstandard.ZstdDecompressor().stream_reader(path.open("rb"), closefd=True)
+    return path.open("rb")
+
+
+__all__ = ["SavedSections", "SectionStore", "open_artifact"]
@@ -0,0 +1,65 @@
+"""Single-pass document analysis: sections and specification from one block stream."""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from ..document.models import Block
+from ..document.reader import iter_block_lines
+from ..document.spec_extractor import SpecificationLocator, SpecificationResult
+from .section_splitter import SectionChunk, SectionSplitter
+
+
+@dataclass(slots=True)
+class DocumentAnalysis:
+    sections: list[SectionChunk]
+    specification: SpecificationResult | None
+    # Seconds spent reading blocks, splitting sections and locating the specification.
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+def analyze_blocks(blocks: Iterable[Block], *, max_section_number: int = 15) -> DocumentAnalysis:
+    """Split sections and locate the specification while consuming ``blocks`` once.
+
+    Blocks are not retained: the splitter keeps only the lines of the current
+    section and the locator only the tables of the best region so far, so with
+    a streaming reader peak memory follows the largest section rather than the
+    whole document. Results match ``split_into_sections`` and
+    ``extract_specification_from_blocks`` run on the same blocks.
+    """
+    splitter = SectionSplitter(max_section_number=max_section_number)
+    locator = SpecificationLocator()
+    clock = time.perf_counter
+    read = split = locate = 0.0
+
+    iterator = iter(blocks)
+    index = 0
+    while True:
+        started = clock()
+        block = next(iterator, None)
+        read_done = clock()
+        read += read_done - started
+        if block is None:
+            break
+        if not splitter.done:
+            for line, _ in iter_block_lines(block):
+                if not splitter.feed(line):
+                    break
+        split_done = clock()
+        split += split_done - read_done
+        locator.feed(index, block)
+        locate += clock() - split_done
+        index += 1
+
+    started = clock()
+    sections = splitter.finish()
+    split += clock() - started
+    return DocumentAnalysis(
+        sections=sections,
+        specification=locator.result(),
+        timings={"parse": read, "split": split, "spec": locate},
+    )
+
+
+__all__ = ["DocumentAnalysis", "analyze_blocks"]
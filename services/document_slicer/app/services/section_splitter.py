@@ -18,46 +18,71 @@ class SectionChunk:
     content: str
 
 
-def split_into_sections(blocks: list[Block], *, max_section_number: int = 15) -> list[SectionChunk]:
-    lines, mapping = blocks_to_prompt_lines_with_mapping(blocks)
-
-    sections: list[SectionChunk] = []
-    current_lines: list[str] = []
-    current_number: int | None = None
-    current_title = "Шапка"
-    header_saved = False
-
-    def flush_section() -> None:
-        nonlocal current_lines, current_number, current_title, header_saved
-        content = "\n".join(line for line in current_lines if line).strip()
-        if content or (current_number is None and not header_saved):
-            sections.append(SectionChunk(number=current_number, title=current_title, content=content))
-            if current_number is None:
-                header_saved = True
-        current_lines = []
-
-    for line, (block_index, _) in zip(lines, mapping):
+class SectionSplitter:
+    """Incremental section splitter fed one prompt line at a time.
+
+    Only the lines of the section being built are held; finished sections are
+    joined into :class:`SectionChunk` objects as soon as the next heading starts.
+    """
+
+    def __init__(self, *, max_section_number: int = 15) -> None:
+        self.max_section_number = max_section_number
+        self.sections: list[SectionChunk] = []
+        self.done = False
+        self._lines: list[str] = []
+        self._number: int | None = None
+        self._title = "Шапка"
+        self._header_saved = False
+
+    def _flush(self) -> None:
+        content = "\n".join(line for line in self._lines if line).strip()
+        if content or (self._number is None and not self._header_saved):
+            self.sections.append(SectionChunk(number=self._number, title=self._title, content=content))
+            if self._number is None:
+                self._header_saved = True
+        self._lines = []
+
+    def feed(self, line: str) -> bool:
+        """Consume a line; returns ``False`` once the numbered sections have ended."""
+        if self.done:
+            return False
+
         if _SECTION_BREAK_RE.match(line):
-            flush_section()
-            break
+            self._flush()
+            self.done = True
+            return False
 
         heading_match = _SECTION_HEADING_RE.match(line)
         if heading_match:
             number = int(heading_match.group("number"))
-            if number > max_section_number:
-                break
+            if number > self.max_section_number:
+                self.done = True
+                return False
 
-            flush_section()
-            current_number = number
+            self._flush()
+            self._number = number
             raw_title = heading_match.group("title")
-            current_title = raw_title.strip() or f"Раздел {number}"
-            current_lines = [line]
-            continue
+            self._title = raw_title.strip() or f"Раздел {number}"
+            self._lines = [line]
+            return True
+
+        self._lines.append(line)
+        return True
 
-        current_lines.append(line)
+    def finish(self) -> list[SectionChunk]:
+        self._flush()
+        self.done = True
+        return self.sections
 
-    flush_section()
-    return sections
+
+def split_into_sections(blocks: list[Block], *, max_section_number: int = 15) -> list[SectionChunk]:
+    lines, _ = blocks_to_prompt_lines_with_mapping(blocks)
+
+    splitter = SectionSplitter(max_section_number=max_section_number)
+    for line in lines:
+        if not splitter.feed(line):
+            break
+    return splitter.finish()
 
 
-__all__ = ["SectionChunk", "split_into_sections"]
\ No newline at end of file
+__all__ = ["SectionChunk", "SectionSplitter", "split_into_sections"]
@@ -0,0 +1 @@
+"""Offline benchmarks for the document slicer; not shipped in the service image."""
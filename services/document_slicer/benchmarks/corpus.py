@@ -0,0 +1,288 @@
+"""Synthetic corpus of Russian supply contracts for slicer benchmarks.
+
+Run from ``services/document_slicer``::
+
+    python -m benchmarks.corpus --out /tmp/corpus --count 50 --seed 7
+
+Each contract has 1..15 numbered sections (``N. Title`` headings with
+``N.M.`` clauses), one or more ``Приложение № K`` appendices with
+specification tables (10..20 000 rows, vertically merged unit cells and a
+spanned total row) and the usual form noise: underscores, dot leaders, dashes
+and guillemets. Contracts are written as DOCX and/or TXT together with a
+``manifest.json`` describing what each file contains. Generation is
+deterministic for a given seed.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from dataclasses import asdict, dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Union
+
+from docx import Document
+from docx.table import _Cell
+
+SECTION_TITLES = [
+    "Предмет договора",
+    "Цена договора и порядок расчётов",
+    "Сроки и условия поставки",
+    "Качество товара и гарантийные обязательства",
+    "Порядок приёмки товара",
+    "Права и обязанности сторон",
+    "Ответственность сторон",
+    "Обстоятельства непреодолимой силы",
+    "Порядок разрешения споров",
+    "Антикоррупционная оговорка",
+    "Конфиденциальность",
+    "Срок действия договора",
+    "Порядок изменения и расторжения договора",
+    "Заключительные положения",
+    "Адреса, реквизиты и подписи сторон",
+]
+
+CLAUSES = [
+    "Поставщик обязуется поставить товар в количестве и ассортименте согласно Спецификации (Приложение № 1).",
+    "Покупатель обязуется принять и оплатить товар в порядке и сроки, установленные настоящим договором.",
+    "Цена договора составляет {amount} руб., в том числе НДС 20 % в размере {vat} руб.",
+    "Оплата производится в течение {days} рабочих дней с даты подписания товарной накладной.",
+    "Поставка осуществляется по адресу: г. Москва, ул. Промышленная, д. {house}, склад № {store}.",
+    "Срок поставки товара: не позднее {days} календарных дней с даты заключения договора.",
+    "Гарантийный срок на товар составляет {months} месяцев с даты приёмки.",
+    "За просрочку исполнения обязательств сторона уплачивает пени в размере 0,1 % за каждый день просрочки.",
+    "Споры разрешаются в Арбитражном суде г. Москвы с соблюдением претензионного порядка (срок ответа {days} дней).",
+    "Стороны освобождаются от ответственности при наступлении обстоятельств непреодолимой силы.",
+    "Настоящий договор вступает в силу с момента подписания и действует до {year} года.",
+    "Все изменения и дополнения действительны, если совершены в письменной форме и подписаны сторонами.",
+]
+
+NOISE = [
+    "«___» ______________ 20__ г.",
+    "Поставщик: ______________________ /_____________/",
+    "Покупатель ....................................... М.П.",
+    "--------------------------------------------",
+    "Подпись ________________ Ф.И.О. ________________",
+]
+
+GOODS = [
+    "Ноутбук ARDOR Gaming RAGE R17",
+    "Монитор 27\" IPS 2560x1440",
+    "Клавиатура проводная USB",
+    "Кабель витая пара UTP cat.5e, 305 м",
+    "Бумага офисная А4, 500 л.",
+    "Картридж лазерный черный",
+    "Стол офисный 1400x700",
+    "Кресло офисное с подлокотниками",
+    "Коммутатор управляемый 24 порта",
+    "Источник бесперебойного питания 1500 ВА",
+]
+
+UNITS = ["шт", "шт.", "компл.", "упак.", "м"]
+SPEC_HEADER = ["№ п/п", "Наименование товара", "Ед. изм.", "Кол-во", "Цена, руб.", "Сумма, руб."]
+
+
+@dataclass(frozen=True)
+class ContractSpec:
+    """Shape of one generated contract."""
+
+    name: str
+    sections: int
+    appendix_rows: list[int]
+    merges: bool
+    noise: bool
+    seed: int
+
+
+@dataclass
+class Table:
+    rows: list[list[str]]
+    # (row, column, last row) vertical merges and the spanned total row index.
+    vertical_merges: list[tuple[int, int, int]]
+    total_row: int
+
+
+Item = Union[str, Table]
+
+
+def _money(value: int) -> str:
+    return f"{value:,}".replace(",", " ") + ",00"
+
+
+def _clause(rng: random.Random) -> str:
+    return rng.choice(CLAUSES).format(
+        amount=_money(rng.randint(10_000, 90_000_000)),
+        vat=_money(rng.randint(1_000, 15_000_000)),
+        days=rng.randint(3, 60),
+        house=rng.randint(1, 120),
+        store=rng.randint(1, 9),
+        months=rng.choice([6, 12, 24, 36]),
+        year=rng.randint(2025, 2030),
+    )
+
+
+def _spec_table(rng: random.Random, rows: int, merges: bool) -> Table:
+    body: list[list[str]] = [list(SPEC_HEADER)]
+    total = 0
+    for number in range(1, rows + 1):
+        qty = rng.randint(1, 500)
+        price = rng.randint(50, 250_000)
+        total += qty * price
+        body.append(
+            [
+                str(number),
+                f"{rng.choice(GOODS)}, арт. {rng.randint(10000, 99999)}",
+                rng.choice(UNITS),
+                str(qty),
+                _money(price),
+                _money(qty * price),
+            ]
+        )
+    body.append(["Итого", "", "", "", "", _money(total)])
+
+    vertical_merges: list[tuple[int, int, int]] = []
+    if merges:
+        # A handful of runs sharing a unit of measure; python-docx merges are
+        # linear in the table size, so larger tables keep the same count.
+        for _ in range(min(10, rows // 10)):
+            start = rng.randint(1, max(1, rows - 5))
+            vertical_merges.append((start, 2, min(rows, start + rng.randint(1, 4))))
+        vertical_merges.sort()
+        merged: list[tuple[int, int, int]] = []
+        for merge in vertical_merges:
+            if not merged or merge[0] > merged[-1][2]:
+                merged.append(merge)
+        vertical_merges = merged
+        for start, column, end in vertical_merges:
+            for row in range(start + 1, end + 1):
+                body[row][column] = body[start][column]
+    return Table(rows=body, vertical_merges=vertical_merges, total_row=rows + 1)
+
+
+def build_items(spec: ContractSpec) -> list[Item]:
+    rng = random.Random(spec.seed)
+    number = f"{rng.randint(1, 999)}/{rng.randint(20, 26)}-П"
+    items: list[Item] = [
+        f"ДОГОВОР ПОСТАВКИ № {number}",
+        f"г. Москва{' ' * 20}«{rng.randint(1, 28)}» марта 2025 г.",
+        "ООО «Альфа», именуемое в дальнейшем «Поставщик», и АО «Бета», именуемое в дальнейшем «Покупатель», "
+        "заключили настоящий договор о нижеследующем:",
+    ]
+    for section in range(1, spec.sections + 1):
+        items.append(f"{section}. {SECTION_TITLES[section - 1]}")
+        for clause in range(1, rng.randint(2, 6) + 1):
+            items.append(f"{section}.{clause}. {_clause(rng)}")
+        if spec.noise and rng.random() < 0.3:
+            items.append(rng.choice(NOISE))
+    if spec.noise:
+        items.extend(rng.sample(NOISE, 3))
+
+    for appendix, rows in enumerate(spec.appendix_rows, start=1):
+        items.append(f"Приложение № {appendix} к договору поставки № {number}")
+        items.append("СПЕЦИФИКАЦИЯ" if appendix == 1 else f"Спецификация № {appendix}")
+        items.append(_spec_table(rng, rows, spec.merges))
+        items.append("Общая сумма по спецификации указана в строке «Итого», в том числе НДС 20 %.")
+        if spec.noise:
+            items.append(NOISE[0])
+            items.append(NOISE[1])
+    return items
+
+
+def render_docx(items: list[Item]) -> bytes:
+    document = Document()
+    for item in items:
+        if isinstance(item, str):
+            document.add_paragraph(item)
+            continue
+        table = document.add_table(rows=len(item.rows), cols=len(item.rows[0]))
+        # Table.cell() and _Row.cells resolve the whole table grid on every
+        # call; wrapping each row's w:tc elements keeps large tables linear.
+        cells = [[_Cell(tc, table) for tc in row._tr.tc_lst] for row in table.rows]
+        continuations = {(row, column) for start, column, end in item.vertical_merges for row in range(start + 1, end + 1)}
+        for row, values in enumerate(item.rows):
+            if row == item.total_row:
+                continue
+            for column, value in enumerate(values):
+                # Continuation cells stay empty: merging concatenates content.
+                if (row, column) not in continuations:
+                    cells[row][column].text = value
+        # Vertical merges keep one w:tc per row, so the wrappers stay valid;
+        # the horizontal total-row merge comes last.
+        for start, column, end in item.vertical_merges:
+            cells[start][column].merge(cells[end][column])
+        total_row = cells[item.total_row]
+        total_row[-1].text = item.rows[item.total_row][-1]
+        total_row[0].merge(total_row[-2]).text = item.rows[item.total_row][0]
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def render_txt(items: list[Item]) -> bytes:
+    lines: list[str] = []
+    for item in items:
+        if isinstance(item, str):
+            lines.append(item)
+        else:
+            lines.extend(" | ".join(cell or "-" for cell in row) for row in item.rows)
+            lines.append("")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def random_spec(rng: random.Random, index: int, max_rows: int) -> ContractSpec:
+    # Most contracts are small; a long tail carries the huge specifications.
+    def rows() -> int:
+        return min(max_rows, int(10 * (2000 ** rng.random())))
+
+    appendices = rng.choices([1, 2, 3, 4], weights=[6, 2, 1, 1])[0]
+    return ContractSpec(
+        name=f"contract_{index:04d}",
+        sections=rng.randint(1, 15),
+        appendix_rows=[rows() for _ in range(appendices)],
+        merges=rng.random() < 0.7,
+        noise=rng.random() < 0.8,
+        seed=rng.randrange(2**32),
+    )
+
+
+def generate_corpus(
+    out: Path,
+    count: int,
+    *,
+    seed: int = 0,
+    formats: tuple[str, ...] = ("docx", "txt"),
+    max_rows: int = 20000,
+) -> list[dict]:
+    out.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    manifest: list[dict] = []
+    renderers = {"docx": render_docx, "txt": render_txt}
+    for index in range(count):
+        spec = random_spec(rng, index, max_rows)
+        items = build_items(spec)
+        for fmt in formats:
+            path = out / f"{spec.name}.{fmt}"
+            path.write_bytes(renderers[fmt](items))
+            manifest.append({"file": path.name, "format": fmt, "bytes": path.stat().st_size, **asdict(spec)})
+    (out / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=Path, required=True, help="directory for the generated files")
+    parser.add_argument("--count", type=int, default=50, help="number of contracts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--formats", default="docx,txt", help="comma-separated subset of docx,txt")
+    parser.add_argument("--max-rows", type=int, default=20000, help="upper bound for specification rows")
+    args = parser.parse_args()
+
+    formats = tuple(fmt.strip() for fmt in args.formats.split(",") if fmt.strip())
+    manifest = generate_corpus(args.out, args.count, seed=args.seed, formats=formats, max_rows=args.max_rows)
+    total = sum(entry["bytes"] for entry in manifest)
+    print(f"{len(manifest)} files, {total / 2**20:.1f} MiB written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
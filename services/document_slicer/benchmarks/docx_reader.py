@@ -0,0 +1,99 @@
+"""Compare the streaming DOCX reader with the python-docx object-model reader.
+
+Run from ``services/document_slicer``::
+
+    python -m benchmarks.docx_reader --rows 5000 --repeat 3
+
+A synthetic contract with a long specification table (horizontally and
+vertically merged cells included) is generated, both readers are timed and
+their peak Python allocations measured with ``tracemalloc``, and the produced
+blocks are checked to be identical.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+import tracemalloc
+from io import BytesIO
+from typing import Callable
+
+from docx import Document
+
+from app.document.models import Block
+from app.document.reader import _parse_docx_python_docx, _parse_docx_stream
+
+
+def build_document(rows: int) -> bytes:
+    document = Document()
+    document.add_paragraph("ДОГОВОР ПОСТАВКИ № 12/34")
+    document.add_paragraph("1. Предмет договора")
+    paragraph = document.add_paragraph("Поставщик обязуется поставить товар")
+    run = paragraph.add_run(" согласно")
+    run.add_tab()
+    run.add_text("спецификации")
+    run.add_break()
+    run.add_text("(Приложение № 1) «__________»")
+    document.add_paragraph("2. Спецификация")
+
+    table = document.add_table(rows=rows + 2, cols=6)
+    header = ["№", "Наименование товара", "Ед. изм.", "Кол-во", "Цена, руб.", "Сумма, руб."]
+    table_rows = list(table.rows)
+    for cell, title in zip(table_rows[0].cells, header):
+        cell.text = title
+    for row in range(1, rows + 1):
+        values = [str(row), f"Товар {row} с характеристиками", "шт", str(row % 7 + 1), "100,00", f"{row}00,00"]
+        for cell, value in zip(table_rows[row].cells, values):
+            cell.text = value
+    # A few vertical merges (same unit for a block of rows) and a spanned total
+    # row; Table.cell() is linear in the table size, so merges are kept rare.
+    for row in range(50, min(rows, 500) + 1, 50):
+        table.cell(row - 4, 2).merge(table.cell(row, 2))
+    total = table.cell(rows + 1, 0).merge(table.cell(rows + 1, 4))
+    total.text = "Итого"
+    table.cell(rows + 1, 5).text = "123 456,00"
+
+    document.add_paragraph("3. Цена договора и порядок расчётов")
+    document.add_paragraph("Цена договора составляет 123 456,00 руб.")
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def measure(parser: Callable[[bytes], list[Block]], payload: bytes, repeat: int) -> tuple[list[Block], float, int]:
+    timings: list[float] = []
+    blocks: list[Block] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        blocks = parser(payload)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    parser(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return blocks, statistics.median(timings), peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="rows in the specification table")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per reader (median is reported)")
+    args = parser.parse_args()
+
+    payload = build_document(args.rows)
+    print(f"document: {len(payload) / 1024:.0f} KiB, {args.rows} specification rows")
+
+    baseline, baseline_time, baseline_peak = measure(_parse_docx_python_docx, payload, args.repeat)
+    streamed, streamed_time, streamed_peak = measure(_parse_docx_stream, payload, args.repeat)
+
+    print(f"python-docx: {baseline_time * 1000:8.1f} ms, peak {baseline_peak / 2**20:7.1f} MiB")
+    print(f"stream:      {streamed_time * 1000:8.1f} ms, peak {streamed_peak / 2**20:7.1f} MiB")
+    print(f"speed-up:    {baseline_time / streamed_time:8.1f}x")
+    if streamed != baseline:
+        raise SystemExit("readers disagree: streamed blocks differ from python-docx blocks")
+    print("blocks identical")
+
+
+if __name__ == "__main__":
+    main()
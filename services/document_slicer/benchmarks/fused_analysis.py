@@ -0,0 +1,79 @@
+"""Compare the multi-pass slicing path with the fused single-pass analyzer.
+
+Run from ``services/document_slicer``::
+
+    python -m benchmarks.fused_analysis --rows 5000 --repeat 3
+
+The multi-pass path materializes all blocks, renders them into prompt lines for
+the section splitter and scans them again for the specification. The fused
+path streams blocks from the reader into ``analyze_blocks`` once. Both are
+timed, their peak Python allocations measured with ``tracemalloc``, and the
+resulting parts are checked to be identical.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+import tracemalloc
+from typing import Callable
+
+from app.document.reader import load_blocks
+from app.pipeline import SectionSerializer, SpecificationExtractor, extract_document_parts
+from app.services.section_splitter import split_into_sections
+from benchmarks.docx_reader import build_document
+
+FILE_NAME = "contract.docx"
+
+
+def multi_pass(payload: bytes) -> dict[str, str]:
+    blocks = load_blocks(FILE_NAME, payload)
+    sections = split_into_sections(blocks)
+    return SectionSerializer.serialize(sections, SpecificationExtractor.extract(blocks))
+
+
+def fused(payload: bytes) -> dict[str, str]:
+    return extract_document_parts(FILE_NAME, payload)
+
+
+def measure(
+    func: Callable[[bytes], dict[str, str]],
+    payload: bytes,
+    repeat: int,
+) -> tuple[dict[str, str], float, int]:
+    timings: list[float] = []
+    parts: dict[str, str] = {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parts = func(payload)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    func(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return parts, statistics.median(timings), peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="rows in the specification table")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per path (median is reported)")
+    args = parser.parse_args()
+
+    payload = build_document(args.rows)
+    print(f"document: {len(payload) / 1024:.0f} KiB, {args.rows} specification rows")
+
+    baseline, baseline_time, baseline_peak = measure(multi_pass, payload, args.repeat)
+    single, single_time, single_peak = measure(fused, payload, args.repeat)
+
+    print(f"multi-pass: {baseline_time * 1000:8.1f} ms, peak {baseline_peak / 2**20:7.1f} MiB")
+    print(f"fused:      {single_time * 1000:8.1f} ms, peak {single_peak / 2**20:7.1f} MiB")
+    print(f"speed-up:   {baseline_time / single_time:8.1f}x")
+    if single != baseline:
+        raise SystemExit("paths disagree: fused parts differ from the multi-pass parts")
+    print("parts identical")
+
+
+if __name__ == "__main__":
+    main()
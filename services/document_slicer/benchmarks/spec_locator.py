@@ -0,0 +1,162 @@
+"""Benchmark the single-pass specification locator on long multi-appendix contracts.
+
+Run from ``services/document_slicer``::
+
+    python -m benchmarks.spec_locator --appendices 200 --repeat 5
+
+Blocks are generated directly (no DOCX parsing) so only the locator is timed.
+The previous algorithm, which re-scanned the rest of the document for every
+heading candidate, is kept here as the reference: results must be identical.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import Callable
+
+from app.document import spec_extractor
+from app.document.models import Block
+from app.document.spec_extractor import SpecificationResult, TableRegion
+from app.document.utils import is_specification_table
+
+
+def build_blocks(appendices: int, rows: int) -> list[Block]:
+    blocks = [
+        Block(type="paragraph", text="ДОГОВОР ПОСТАВКИ № 12/34"),
+        Block(type="paragraph", text="1. Предмет договора"),
+        Block(type="paragraph", text="Поставщик обязуется поставить товар согласно Приложению № 1 к договору."),
+    ]
+    for number in range(1, appendices + 1):
+        blocks.append(Block(type="paragraph", text=f"Приложение № {number}"))
+        blocks.append(Block(type="paragraph", text="к договору № 12/34 от 01.02.2024"))
+        blocks.append(Block(type="paragraph", text="Порядок приёмки товара по количеству и качеству"))
+        blocks.append(
+            Block(type="table", text="", rows=[["Подпись", "Дата"], ["Поставщик", "Покупатель"]])
+        )
+        if number % 10 == 0:
+            table_rows = [["№", "Наименование товара", "Ед. изм.", "Кол-во", "Цена, руб."]]
+            table_rows += [[str(row), f"Товар {row}", "шт", str(row % 5 + 1), "100,00"] for row in range(1, rows + 1)]
+            blocks.append(Block(type="table", text="", rows=table_rows))
+            blocks.append(Block(type="paragraph", text="Общая сумма: 100 000,00 руб."))
+    blocks.append(Block(type="paragraph", text="СПЕЦИФИКАЦИЯ"))
+    table_rows = [["№", "Наименование", "Количество", "Цена"]]
+    table_rows += [[str(row), f"Позиция {row}", "1 шт", "10,00"] for row in range(1, rows + 1)]
+    blocks.append(Block(type="table", text="", rows=table_rows))
+    return blocks
+
+
+def _collect_reference(blocks: list[Block], index: int) -> tuple[list[TableRegion], int] | None:
+    """Verbatim copy of the pre-refactoring ``_collect_tables_after_heading``."""
+    end_patterns = ["общая цена", "общая сумма"]
+
+    tables: list[TableRegion] = []
+    last_relevant_index = index
+    found_tables = False
+
+    for cursor in range(index + 1, len(blocks)):
+        block = blocks[cursor]
+
+        if block.type == "paragraph":
+            text = (block.text or "").strip()
+            normalized = text.casefold()
+
+            if not text:
+                continue
+
+            if found_tables and any(pattern in normalized for pattern in end_patterns):
+                last_relevant_index = cursor
+                break
+
+            if found_tables and spec_extractor._looks_like_heading(text):
+                break
+
+            if not found_tables:
+                continue
+
+            last_relevant_index = cursor
+            continue
+
+        if block.type != "table":
+            continue
+        rows = block.rows or []
+        if not rows:
+            continue
+
+        if not is_specification_table(block):
+            if found_tables:
+                break
+            continue
+
+        tables.append(TableRegion(index=cursor, start_index=cursor, end_index=cursor, block=block))
+        last_relevant_index = cursor
+        found_tables = True
+
+    if not tables:
+        return None
+    if last_relevant_index < tables[-1].end_index:
+        last_relevant_index = tables[-1].end_index
+
+    return tables, last_relevant_index
+
+
+def locate_reference(blocks: list[Block]) -> SpecificationResult | None:
+    """The pre-refactoring locator: a full forward scan per heading candidate."""
+    best_result: tuple[tuple[int, int], SpecificationResult] | None = None
+    for idx, block in enumerate(blocks):
+        if not spec_extractor._is_heading_candidate(block):
+            continue
+        collected = _collect_reference(blocks, idx)
+        if collected is None:
+            continue
+        tables, end_index = collected
+        if not tables:
+            continue
+        heading_text = (block.text or "").strip() or "Спецификация"
+        key = (spec_extractor._heading_priority(heading_text), idx)
+        result = SpecificationResult(
+            heading=heading_text,
+            start_index=idx,
+            end_index=end_index,
+            tables=tables,
+            start_block=block,
+            end_block=blocks[end_index],
+        )
+        if best_result is None or key < best_result[0]:
+            best_result = (key, result)
+    return None if best_result is None else best_result[1]
+
+
+def measure(locate: Callable[[list[Block]], SpecificationResult | None], blocks: list[Block], repeat: int):
+    timings: list[float] = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = locate(blocks)
+        timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--appendices", type=int, default=200, help="number of 'Приложение № N к договору' sections")
+    parser.add_argument("--rows", type=int, default=50, help="rows per specification table")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per locator (median is reported)")
+    args = parser.parse_args()
+
+    blocks = build_blocks(args.appendices, args.rows)
+    print(f"blocks: {len(blocks)}, appendices: {args.appendices}")
+
+    expected, reference_time = measure(locate_reference, blocks, max(1, args.repeat // 2))
+    actual, single_pass_time = measure(spec_extractor._locate_specification, blocks, args.repeat)
+
+    print(f"per-heading scan: {reference_time * 1000:9.1f} ms")
+    print(f"single pass:      {single_pass_time * 1000:9.1f} ms")
+    print(f"speed-up:         {reference_time / single_pass_time:9.1f}x")
+    if actual != expected:
+        raise SystemExit("locators disagree: single-pass result differs from the reference")
+    print(f"results identical (heading {expected.heading!r} at block {expected.start_index})" if expected else "no specification found by either locator")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Slicer throughput per stage over a synthetic contract corpus.
+
+Run from ``services/document_slicer``::
+
+    python -m benchmarks.corpus --out /tmp/corpus --count 50
+    python -m benchmarks.throughput --corpus /tmp/corpus --repeat 3
+
+For every stage (``load_blocks``, ``split_into_sections``,
+``extract_specification_from_blocks`` and the fused ``extract_document_parts``
+used in production) each corpus file is processed ``--repeat`` times and
+docs/sec, p50/p95 latency and peak RSS are reported. Stages run in a fresh
+process each, so peak RSS belongs to that stage alone. Inputs a stage needs
+(file bytes, parsed blocks) are prepared outside the timed section but do
+count towards its peak RSS, as they would in the service.
+Use ``--json`` to keep a machine-readable report for regression checks.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import multiprocessing
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+from app.document.models import Block
+from app.document.reader import load_blocks
+from app.document.spec_extractor import extract_specification_from_blocks
+from app.pipeline import extract_document_parts
+from app.services.section_splitter import split_into_sections
+
+
+def _spec_or_none(blocks: list[Block]) -> Any:
+    try:
+        return extract_specification_from_blocks(blocks)
+    except ValueError:
+        return None
+
+
+# name -> (needs parsed blocks, callable taking (file name, bytes, blocks))
+STAGES: dict[str, tuple[bool, Callable[[str, bytes, list[Block] | None], Any]]] = {
+    "load_blocks": (False, lambda name, payload, _: load_blocks(name, payload)),
+    "split_into_sections": (True, lambda _, __, blocks: split_into_sections(blocks)),
+    "extract_specification": (True, lambda _, __, blocks: _spec_or_none(blocks)),
+    "extract_document_parts": (False, lambda name, payload, _: extract_document_parts(name, payload)),
+}
+
+
+def _max_rss_bytes() -> int:
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_stage(stage: str, files: list[str], repeat: int) -> dict[str, Any]:
+    """Time one stage over ``files``; meant to run in its own process."""
+    needs_blocks, func = STAGES[stage]
+    baseline_rss = _max_rss_bytes()
+    latencies: list[float] = []
+    for file in files:
+        path = Path(file)
+        payload = path.read_bytes()
+        blocks = load_blocks(path.name, payload) if needs_blocks else None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(path.name, payload, blocks)
+            latencies.append(time.perf_counter() - started)
+        del payload, blocks
+
+    busy = sum(latencies)
+    return {
+        "stage": stage,
+        "docs": len(latencies),
+        "docs_per_sec": len(latencies) / busy if busy else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000,
+        "peak_rss_mib": _max_rss_bytes() / 2**20,
+        "baseline_rss_mib": baseline_rss / 2**20,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, required=True, help="directory produced by benchmarks.corpus")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per file and stage")
+    parser.add_argument("--formats", default="docx,txt", help="comma-separated file formats to include")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated stages to run")
+    parser.add_argument("--json", type=Path, help="also write the report to this file")
+    args = parser.parse_args()
+
+    formats = {fmt.strip() for fmt in args.formats.split(",") if fmt.strip()}
+    files = sorted(str(path) for path in args.corpus.iterdir() if path.suffix.lstrip(".") in formats)
+    if not files:
+        raise SystemExit(f"no {'/'.join(sorted(formats))} files in {args.corpus}")
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise SystemExit(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    total_bytes = sum(Path(file).stat().st_size for file in files)
+    print(f"corpus: {len(files)} files, {total_bytes / 2**20:.1f} MiB, repeat {args.repeat}")
+    print(f"{'stage':<24} {'docs/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'peak RSS MiB':>13}")
+
+    report = []
+    context = multiprocessing.get_context("spawn")
+    for stage in stages:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(run_stage, stage, files, args.repeat).result()
+        report.append(result)
+        print(
+            f"{stage:<24} {result['docs_per_sec']:9.1f} {result['p50_ms']:9.1f} {result['p95_ms']:9.1f}"
+            f" {result['max_ms']:9.1f} {result['peak_rss_mib']:13.1f}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps({"files": len(files), "bytes": total_bytes, "stages": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(content_digest: str, version: str) -> str:
+    """Cache key for an upload: its SHA-256 scoped by the model/prompt version key."""
+    return hashlib.sha256(f"{version}\0{content_digest}".encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Disk-backed cache of aggregated results with LRU and TTL eviction.
+
+    Each entry is one JSON file named after its key. A file's mtime is the time
+    it was stored (used for the TTL) and its atime the last hit, so the LRU order
+    survives a restart. File I/O runs in worker threads; the index is only
+    touched on the event loop.
+    """
+
+    def __init__(self, directory: Path, *, ttl: float, max_entries: int, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._index: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    async def load(self) -> None:
+        """Rebuild the index from the files already on disk."""
+        entries = await asyncio.to_thread(self._scan)
+        self._index.clear()
+        self._total_bytes = 0
+        for key, size, mtime in entries:
+            self._index[key] = (size, mtime)
+            self._total_bytes += size
+        await self._evict()
+
+    def _scan(self) -> list[tuple[str, int, float]]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries: list[tuple[str, int, float, float]] = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path.stem, stat.st_size, stat.st_mtime, stat.st_atime))
+        entries.sort(key=lambda item: item[3])
+        return [(key, size, mtime) for key, size, mtime, _ in entries]
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        entry = self._index.get(key)
+        if entry is None or time.time() - entry[1] > self.ttl:
+            if entry is not None:
+                await self._drop([key])
+            self.misses += 1
+            return None
+
+        try:
+            value = await asyncio.to_thread(self._read, key)
+        except (OSError, ValueError):
+            logger.warning("Dropping unreadable cache entry %s", key)
+            await self._drop([key])
+            self.misses += 1
+            return None
+
+        self._index.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _read(self, key: str) -> dict[str, Any]:
+        path = self._path(key)
+        value = json.loads(path.read_bytes())
+        # Record the hit in atime; mtime stays the store time used for the TTL.
+        os.utime(path, (time.time(), path.stat().st_mtime))
+        return value
+
+    async def put(self, key: str, value: dict[str, Any]) -> None:
+        try:
+            size = await asyncio.to_thread(self._write, key, value)
+        except (OSError, TypeError, ValueError):
+            logger.exception("Failed to store cache entry %s", key)
+            return
+
+        previous = self._index.pop(key, None)
+        if previous is not None:
+            self._total_bytes -= previous[0]
+        self._index[key] = (size, time.time())
+        self._total_bytes += size
+        await self._evict()
+
+    def _write(self, key: str, value: dict[str, Any]) -> int:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        body = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        path = self._path(key)
+        # A private temp file per writer: two requests finishing the same
+        # content never interleave, and the last rename wins whole.
+        handle, name = tempfile.mkstemp(prefix=".incoming-", dir=self.directory)
+        try:
+            with os.fdopen(handle, "wb") as file:
+                file.write(body)
+            os.replace(name, path)
+        except BaseException:
+            Path(name).unlink(missing_ok=True)
+            raise
+        return len(body)
+
+    async def _evict(self) -> None:
+        now = time.time()
+        victims = [key for key, (_, stored_at) in self._index.items() if now - stored_at > self.ttl]
+        remaining = len(self._index) - len(victims)
+        remaining_bytes = self._total_bytes - sum(self._index[key][0] for key in victims)
+        for key, (size, _) in self._index.items():
+            if remaining <= self.max_entries and remaining_bytes <= self.max_bytes:
+                break
+            if key in victims:
+                continue
+            victims.append(key)
+            remaining -= 1
+            remaining_bytes -= size
+        if victims:
+            await self._drop(victims)
+
+    async def _drop(self, keys: list[str]) -> None:
+        for key in keys:
+            entry = self._index.pop(key, None)
+            if entry is not None:
+                self._total_bytes -= entry[0]
+        await asyncio.to_thread(self._unlink, keys)
+
+    def _unlink(self, keys: list[str]) -> None:
+        for key in keys:
+            try:
+                self._path(key).unlink(missing_ok=True)
+            except OSError:
+                logger.warning("Failed to remove cache entry %s", key)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._index),
+            "bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+__all__ = ["ResultCache", "content_key"]
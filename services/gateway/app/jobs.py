@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable
+
+from .rpc import PROGRESS_MESSAGE_TYPE
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_TIMEOUT = "timeout"
+
+_FINISHED_STATUSES = {JOB_DONE, JOB_TIMEOUT}
+
+
+def _terminate(listener: asyncio.Queue) -> None:
+    """Push the end-of-stream marker, making room for it if the buffer is full."""
+    if listener.full():
+        listener.get_nowait()
+    listener.put_nowait(None)
+
+
+@dataclass
+class Job:
+    """Asynchronous upload tracked by the gateway until its result expires."""
+
+    task_id: str
+    filename: str
+    status: str = JOB_QUEUED
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    services: list[str] = field(default_factory=list)
+    pending: list[str] = field(default_factory=list)
+    missing_services: list[str] = field(default_factory=list)
+    result: dict[str, Any] | None = None
+    events: list[dict[str, Any]] = field(default_factory=list)
+    listeners: set[asyncio.Queue] = field(default_factory=set)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED_STATUSES
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "task_id": self.task_id,
+            "filename": self.filename,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "services": list(self.services),
+            "pending": list(self.pending),
+            "missing_services": list(self.missing_services),
+            "result": self.result,
+        }
+
+
+class JobStore:
+    """In-memory job registry with TTL eviction and per-job event fan-out.
+
+    Every event is kept on the job so late SSE subscribers can replay the
+    history before following live updates. Finished jobs stay readable for
+    ``ttl`` seconds; unfinished ones are marked as timed out after ``timeout``.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float,
+        timeout: float,
+        on_expire: Callable[[str], None] | None = None,
+        listener_buffer: int = 64,
+    ) -> None:
+        self.ttl = ttl
+        self.timeout = timeout
+        self.on_expire = on_expire
+        self.listener_buffer = listener_buffer
+        self._jobs: dict[str, Job] = {}
+
+    def create(self, task_id: str, filename: str) -> Job:
+        job = Job(task_id=task_id, filename=filename)
+        self._jobs[task_id] = job
+        self._emit(job, "status", {"status": job.status})
+        return job
+
+    def get(self, task_id: str) -> Job | None:
+        return self._jobs.get(task_id)
+
+    def discard(self, task_id: str) -> None:
+        self._jobs.pop(task_id, None)
+
+    def handle_reply(self, task_id: str, message_type: str | None, body: dict[str, Any]) -> None:
+        """Apply an aggregator message (progress or final result) to the job."""
+        job = self._jobs.get(task_id)
+        if job is None or job.finished:
+            return
+
+        job.updated_at = time.time()
+        if message_type == PROGRESS_MESSAGE_TYPE:
+            job.status = JOB_RUNNING
+            job.services = list(body.get("received") or job.services)
+            job.pending = list(body.get("pending") or [])
+            self._emit(
+                job,
+                "progress",
+                {"service": body.get("service"), "received": job.services, "pending": job.pending},
+            )
+            return
+
+        job.status = JOB_DONE
+        job.finished_at = job.updated_at
+        job.pending = []
+        job.missing_services = list(body.get("missing_services") or [])
+        job.result = body.get("result", body)
+        self._emit(job, "result", job.snapshot())
+        self._close_listeners(job)
+
+    def handle_supplement(self, task_id: str, body: dict[str, Any]) -> None:
+        """Merge a late service result into a job finished with missing services."""
+        job = self._jobs.get(task_id)
+        service = body.get("service")
+        if job is None or job.result is None or not service:
+            return
+
+        job.updated_at = time.time()
+        job.result[service] = body.get("payload", {})
+        job.missing_services = list(body.get("missing_services") or [])
+        self._emit(job, "supplement", {"service": service, "missing_services": job.missing_services})
+
+    def _emit(self, job: Job, event: str, data: dict[str, Any]) -> None:
+        record = {"event": event, "time": time.time(), "data": data}
+        job.events.append(record)
+        for listener in list(job.listeners):
+            try:
+                listener.put_nowait(record)
+            except asyncio.QueueFull:
+                # A stalled client must not grow memory: end its stream, it can
+                # reconnect and replay the history from job.events.
+                job.listeners.discard(listener)
+                _terminate(listener)
+
+    @staticmethod
+    def _close_listeners(job: Job) -> None:
+        for listener in list(job.listeners):
+            _terminate(listener)
+        job.listeners.clear()
+
+    async def subscribe(self, job: Job) -> AsyncIterator[dict[str, Any]]:
+        """Yield the job's past events and then live ones until it finishes."""
+        # History and registration are captured together so nothing emitted
+        # while the replay is being sent can fall between the two.
+        history = list(job.events)
+        if job.finished:
+            for record in history:
+                yield record
+            return
+
+        listener: asyncio.Queue = asyncio.Queue(maxsize=self.listener_buffer)
+        job.listeners.add(listener)
+        try:
+            for record in history:
+                yield record
+            while True:
+                record = await listener.get()
+                if record is None:
+                    return
+                yield record
+        finally:
+            job.listeners.discard(listener)
+
+    def sweep(self, now: float | None = None) -> None:
+        """Time out overdue jobs and evict the ones whose TTL has passed."""
+        now = now if now is not None else time.time()
+        for task_id, job in list(self._jobs.items()):
+            if not job.finished and now - job.created_at > self.timeout:
+                job.status = JOB_TIMEOUT
+                job.finished_at = now
+                job.updated_at = now
+                self._emit(job, "timeout", job.snapshot())
+                self._close_listeners(job)
+                if self.on_expire is not None:
+                    self.on_expire(task_id)
+            if job.finished_at is not None and now - job.finished_at > self.ttl:
+                self._jobs.pop(task_id, None)
+
+    async def run_janitor(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.sweep()
+
+
+__all__ = ["Job", "JobStore", "JOB_DONE", "JOB_QUEUED", "JOB_RUNNING", "JOB_TIMEOUT"]
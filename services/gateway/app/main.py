@@ -1,18 +1,61 @@
 from __future__ import annotations
 
 import asyncio
-import base64
 import json
 import uuid
+from contextlib import asynccontextmanager, suppress
+from typing import Any
 
-import aio_pika
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import FastAPI, File, HTTPException, Query, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from .blob_store import BlobRef, BlobStore, BlobTooLargeError
+from .cache import ResultCache, content_key
 from .config import Settings
+from .jobs import JobStore
+from .rpc import PROGRESS_MESSAGE_TYPE, RpcClient
 
-app = FastAPI(title="Gateway")
 settings = Settings()
+rpc_client = RpcClient(settings.rabbitmq_url, request_queue=settings.upload_queue)
+jobs = JobStore(ttl=settings.job_ttl, timeout=settings.job_timeout, on_expire=rpc_client.discard)
+rpc_client.on_supplement = jobs.handle_supplement
+blob_store = BlobStore(settings.blob_store_dir)
+result_cache = ResultCache(
+    settings.cache_dir,
+    ttl=settings.cache_ttl,
+    max_entries=settings.cache_max_entries,
+    max_bytes=settings.cache_max_bytes,
+)
+
+# Identical uploads that arrive while the first one is still being processed
+# share its outcome instead of running the whole pipeline again.
+inflight_uploads: dict[str, asyncio.Future] = {}
+inflight_jobs: dict[str, str] = {}
+_background_tasks: set[asyncio.Task] = set()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await rpc_client.connect()
+    if settings.cache_enabled:
+        await result_cache.load()
+    janitors = [
+        asyncio.create_task(jobs.run_janitor(settings.job_sweep_interval)),
+        asyncio.create_task(_prune_blobs()),
+    ]
+    try:
+        yield
+    finally:
+        for janitor in janitors:
+            janitor.cancel()
+        for janitor in janitors:
+            with suppress(asyncio.CancelledError):
+                await janitor
+        await rpc_client.close()
+
+
+app = FastAPI(title="Gateway", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,58 +65,162 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-async def _await_response(correlation_id: str, reply_queue: aio_pika.Queue, timeout: float):
-    future = asyncio.get_event_loop().create_future()
-
-    async def _on_message(message: aio_pika.IncomingMessage) -> None:
-        if message.correlation_id != correlation_id:
-            return
-        async with message.process():
-            future.set_result(json.loads(message.body.decode()))
 
-    await reply_queue.consume(_on_message, no_ack=False)
-    return await asyncio.wait_for(future, timeout=timeout)
+async def _prune_blobs() -> None:
+    """Drop uploads and slicer parts nobody has touched for BLOB_TTL seconds."""
+    while True:
+        await asyncio.sleep(settings.blob_prune_interval)
+        await asyncio.to_thread(blob_store.prune, settings.blob_ttl)
 
 
-@app.post("/upload")
-async def upload_document(file: UploadFile = File(...)):
-    content = await file.read()
-    if not content:
+async def _spool_upload(file: UploadFile) -> BlobRef:
+    """Stream the upload into the shared blob store instead of holding it in memory."""
+    try:
+        ref = await blob_store.put_stream(file.read, max_bytes=settings.max_upload_bytes)
+    except BlobTooLargeError as exc:
+        raise HTTPException(status_code=413, detail="Файл превышает допустимый размер") from exc
+    if not ref.size:
         raise HTTPException(status_code=400, detail="Файл пуст")
+    return ref
+
+
+def _build_payload(task_id: str, filename: str, content: BlobRef, *, notify_progress: bool = False) -> dict[str, Any]:
+    return {
+        "task_id": task_id,
+        "filename": filename,
+        "content_ref": content.as_dict(),
+        "reply_to": rpc_client.reply_to,
+        "notify_progress": notify_progress,
+    }
+
+
+def _is_cacheable(response: dict[str, Any]) -> bool:
+    """Only complete results are cached; service errors and missed deadlines should be retried."""
+    result = response.get("result")
+    if not isinstance(result, dict) or response.get("missing_services"):
+        return False
+    return not any(isinstance(payload, dict) and "error" in payload for payload in result.values())
+
 
-    correlation_id = str(uuid.uuid4())
-    connection = await aio_pika.connect_robust(settings.rabbitmq_url)
-    async with connection:
-        channel = await connection.channel()
-        reply_queue = await channel.declare_queue(exclusive=True)
-
-        payload = {
-            "task_id": correlation_id,
-            "filename": file.filename or "document.docx",
-            "content": base64.b64encode(content).decode(),
-            "reply_to": reply_queue.name,
-        }
-
-        upload_queue = await channel.declare_queue(settings.upload_queue, durable=True)
-        await channel.default_exchange.publish(
-            aio_pika.Message(
-                body=json.dumps(payload).encode(),
-                correlation_id=correlation_id,
-                reply_to=reply_queue.name,
-                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-                content_type="application/json",
-            ),
-            routing_key=upload_queue.name,
-        )
-
-        try:
-            response = await _await_response(correlation_id, reply_queue, timeout=settings.response_timeout)
-        except asyncio.TimeoutError as exc:
-            raise HTTPException(status_code=504, detail="Не дождались ответа от агрегатора") from exc
+async def _store_result(key: str, response: dict[str, Any]) -> None:
+    if settings.cache_enabled and _is_cacheable(response):
+        await result_cache.put(key, response)
+
+
+async def _dispatch_upload(key: str, payload: dict[str, Any], correlation_id: str) -> dict[str, Any]:
+    response = await rpc_client.call(payload, correlation_id=correlation_id, timeout=settings.response_timeout)
+    await _store_result(key, response)
+    return response
+
+
+@app.post("/upload")
+async def upload_document(file: UploadFile = File(...), refresh: bool = Query(False)):
+    content = await _spool_upload(file)
+    key = content_key(content.digest, settings.cache_version)
+
+    if settings.cache_enabled and not refresh:
+        cached = await result_cache.get(key)
+        if cached is not None:
+            return JSONResponse(content=cached, headers={"X-Cache": "hit"})
+
+    inflight = inflight_uploads.get(key)
+    if inflight is None:
+        correlation_id = str(uuid.uuid4())
+        payload = _build_payload(correlation_id, file.filename or "document.docx", content)
+        inflight = asyncio.ensure_future(_dispatch_upload(key, payload, correlation_id))
+        inflight_uploads[key] = inflight
+        inflight.add_done_callback(lambda _: inflight_uploads.pop(key, None))
+
+    try:
+        # Shielded so a client that disconnects does not cancel the shared call.
+        response = await asyncio.shield(inflight)
+    except asyncio.TimeoutError as exc:
+        raise HTTPException(status_code=504, detail="Не дождались ответа от агрегатора") from exc
 
     return response
 
 
+def _job_reply_handler(task_id: str, key: str):
+    def _on_reply(message_type: str | None, body: dict[str, Any]) -> None:
+        jobs.handle_reply(task_id, message_type, body)
+        if message_type != PROGRESS_MESSAGE_TYPE:
+            inflight_jobs.pop(key, None)
+            task = asyncio.get_running_loop().create_task(_store_result(key, body))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+
+    return _on_reply
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(file: UploadFile = File(...), refresh: bool = Query(False)) -> dict[str, Any]:
+    """Queue a document and return its task_id without waiting for the aggregator."""
+    content = await _spool_upload(file)
+    key = content_key(content.digest, settings.cache_version)
+    filename = file.filename or "document.docx"
+
+    existing = jobs.get(inflight_jobs.get(key, ""))
+    if existing is not None and not existing.finished:
+        return _job_links(existing.task_id, existing.status, cached=False)
+    inflight_jobs.pop(key, None)
+
+    task_id = str(uuid.uuid4())
+    cached = await result_cache.get(key) if settings.cache_enabled and not refresh else None
+    job = jobs.create(task_id, filename)
+    if cached is not None:
+        jobs.handle_reply(task_id, None, cached)
+        return _job_links(task_id, job.status, cached=True)
+
+    payload = _build_payload(task_id, filename, content, notify_progress=True)
+    inflight_jobs[key] = task_id
+    try:
+        await rpc_client.send(payload, correlation_id=task_id, on_reply=_job_reply_handler(task_id, key))
+    except Exception as exc:
+        inflight_jobs.pop(key, None)
+        jobs.discard(task_id)
+        raise HTTPException(status_code=503, detail="Не удалось поставить задачу в очередь") from exc
+
+    return _job_links(task_id, job.status, cached=False)
+
+
+def _job_links(task_id: str, status: str, *, cached: bool) -> dict[str, Any]:
+    return {
+        "task_id": task_id,
+        "status": status,
+        "cached": cached,
+        "status_url": f"/jobs/{task_id}",
+        "events_url": f"/jobs/{task_id}/events",
+    }
+
+
+@app.get("/jobs/{task_id}")
+async def get_job(task_id: str) -> JSONResponse:
+    job = jobs.get(task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена или срок хранения результата истёк")
+    return JSONResponse(content=job.snapshot())
+
+
+@app.get("/jobs/{task_id}/events")
+async def job_events(task_id: str) -> StreamingResponse:
+    """Server-sent events: one event per service result plus the final result."""
+    job = jobs.get(task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена или срок хранения результата истёк")
+
+    async def event_stream():
+        async for record in jobs.subscribe(job):
+            data = json.dumps({"time": record["time"], **record["data"]}, ensure_ascii=False)
+            yield f"event: {record['event']}\ndata: {data}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@app.get("/cache/stats")
+async def cache_stats() -> dict[str, Any]:
+    return {"enabled": settings.cache_enabled, **result_cache.stats()}
+
+
 @app.get("/health")
 async def health() -> dict[str, str]:
     return {"status": "ok"}
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from typing import Any, Callable
+
+import aio_pika
+from aio_pika.abc import AbstractChannel, AbstractIncomingMessage, AbstractQueue, AbstractRobustConnection
+
+from .codec import MessageCodec, decode_message
+
+logger = logging.getLogger(__name__)
+
+# Called with the AMQP message type ("progress" for intermediate events,
+# anything else for the final reply) and the decoded body.
+ReplyHandler = Callable[[str | None, dict[str, Any]], None]
+
+# Called with the correlation id and body of a late service result that the
+# aggregator forwards after it already published a degraded final reply.
+SupplementHandler = Callable[[str, dict[str, Any]], None]
+
+PROGRESS_MESSAGE_TYPE = "progress"
+SUPPLEMENT_MESSAGE_TYPE = "supplement"
+
+
+class RpcClient:
+    """Process-wide RPC client multiplexing every upload over one reply queue.
+
+    A single robust connection and channel are opened on startup together with
+    one exclusive reply queue. Replies are routed to the waiting request through
+    a ``correlation_id`` -> handler map; entries are dropped as soon as the
+    request completes or times out, so late replies are simply acknowledged.
+    Intermediate ``progress`` messages are passed to the handler without
+    completing the request; ``supplement`` messages arriving after the final
+    reply go to ``on_supplement``. Requests are encoded with ``codec`` and
+    replies decoded by their ``content_type`` / ``content_encoding``.
+    """
+
+    def __init__(self, url: str, *, request_queue: str, codec: MessageCodec | None = None) -> None:
+        self.url = url
+        self.request_queue = request_queue
+        self.codec = codec or MessageCodec.from_env()
+        self.reply_queue_name = f"gateway.replies.{uuid.uuid4().hex}"
+        self._connection: AbstractRobustConnection | None = None
+        self._channel: AbstractChannel | None = None
+        self._reply_queue: AbstractQueue | None = None
+        self._handlers: dict[str, ReplyHandler] = {}
+        self.on_supplement: SupplementHandler | None = None
+
+    @property
+    def reply_to(self) -> str:
+        return self.reply_queue_name
+
+    async def connect(self) -> None:
+        """Open the connection, declare queues once and start consuming replies."""
+        if self._connection is not None:
+            return
+        self._connection = await aio_pika.connect_robust(self.url)
+        self._channel = await self._connection.channel(publisher_confirms=True)
+        await self._channel.declare_queue(self.request_queue, durable=True)
+        # A client-chosen name lets the robust connection redeclare the same
+        # queue after a reconnect instead of losing server-named replies.
+        self._reply_queue = await self._channel.declare_queue(
+            self.reply_queue_name,
+            exclusive=True,
+            auto_delete=True,
+        )
+        await self._reply_queue.consume(self._on_reply)
+
+    async def close(self) -> None:
+        self._handlers.clear()
+        if self._connection is not None:
+            await self._connection.close()
+        self._connection = None
+        self._channel = None
+        self._reply_queue = None
+
+    async def _on_reply(self, message: AbstractIncomingMessage) -> None:
+        async with message.process():
+            correlation_id = message.correlation_id
+            handler = self._handlers.get(correlation_id) if correlation_id else None
+            is_supplement = message.type == SUPPLEMENT_MESSAGE_TYPE and self.on_supplement is not None
+            if handler is None and not is_supplement:
+                logger.warning("Dropping reply without a waiting request: %s", correlation_id)
+                return
+            try:
+                body = decode_message(message)
+            except ValueError:
+                logger.exception("Malformed reply for %s", correlation_id)
+                return
+            if handler is None:
+                self.on_supplement(correlation_id, body)
+                return
+            if message.type != PROGRESS_MESSAGE_TYPE:
+                self._handlers.pop(correlation_id, None)
+            handler(message.type, body)
+
+    async def send(self, payload: dict[str, Any], *, correlation_id: str, on_reply: ReplyHandler) -> None:
+        """Publish a request and route its replies to ``on_reply`` until the final one."""
+        if self._channel is None:
+            raise RuntimeError("RPC client is not connected")
+
+        encoded = self.codec.encode(payload)
+        self._handlers[correlation_id] = on_reply
+        try:
+            await self._channel.default_exchange.publish(
+                aio_pika.Message(
+                    body=encoded.body,
+                    correlation_id=correlation_id,
+                    reply_to=self.reply_to,
+                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                    content_type=encoded.content_type,
+                    content_encoding=encoded.content_encoding,
+                ),
+                routing_key=self.request_queue,
+            )
+        except Exception:
+            self._handlers.pop(correlation_id, None)
+            raise
+
+    def discard(self, correlation_id: str) -> None:
+        """Stop routing replies for a request that is no longer awaited."""
+        self._handlers.pop(correlation_id, None)
+
+    async def call(self, payload: dict[str, Any], *, correlation_id: str, timeout: float) -> dict[str, Any]:
+        """Publish a request and wait up to ``timeout`` seconds for its final reply."""
+        future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+
+        def _resolve(message_type: str | None, body: dict[str, Any]) -> None:
+            if message_type != PROGRESS_MESSAGE_TYPE and not future.done():
+                future.set_result(body)
+
+        await self.send(payload, correlation_id=correlation_id, on_reply=_resolve)
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            self.discard(correlation_id)
+
+
+__all__ = [
+    "PROGRESS_MESSAGE_TYPE",
+    "ReplyHandler",
+    "RpcClient",
+    "SUPPLEMENT_MESSAGE_TYPE",
+    "SupplementHandler",
+]